@@ -1,4 +1,5 @@
 import numpy as np
+import sys
 
 
 def map(value, min, max, min_target, max_target):
@@ -26,3 +27,32 @@ def stick_to_edge(value, low, high):
     if low_distance > high_distance:
         return high
     return low
+
+
+def deep_getsizeof(obj, seen=None):
+    """
+    :return: approximate number of bytes held by obj, following
+             __dict__, __slots__, containers and numpy buffers;
+             shared objects are only counted once
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_getsizeof(k, seen) + deep_getsizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_getsizeof(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deep_getsizeof(obj.__dict__, seen)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_getsizeof(getattr(obj, slot), seen)
+    return size
@@ -0,0 +1,498 @@
+import logging
+import numpy as np
+from math import pi
+from brain import Brain
+from dna import BrainDNA, DNA, gene_matrix
+from objects import BrainCreature, Creature, DnaCreature
+
+logger = logging.getLogger(__name__)
+
+
+def _per_world(value, n_worlds: int, dtype=float) -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (n_worlds,)).copy()
+
+
+def _collide(left_a, top_a, width_a, height_a, left_b, top_b, width_b, height_b):
+    """same test as pygame.Rect.colliderect, broadcasting over the arguments"""
+    dx = left_a - left_b
+    dy = top_a - top_b
+    return (dx < width_b) & (dx > -width_a) & (dy < height_b) & (dy > -height_a)
+
+
+def _span(alive: np.ndarray) -> int:
+    """number of leading slots that hold every live entry of every world"""
+    used = alive.any(axis=0)
+    return int(np.flatnonzero(used)[-1]) + 1 if used.any() else 0
+
+
+def _stick_to_edge(value, low, high):
+    """vectorized auxiliary.stick_to_edge"""
+    inside = (value >= low) & (value <= high)
+    edge = np.where(np.abs(low - value) > np.abs(high - value), high, low)
+    return np.where(inside, edge, value)
+
+
+class BatchWorld:
+    """
+    W independent headless worlds of BrainCreatures advanced together
+
+    Every creature attribute is an array with a leading world axis, shape (W, capacity),
+    and dead creatures are just free slots. The rules follow World / BrainCreature;
+    the differences are that a creature reproduces sexually with at most one partner per
+    tick and that creatures act simultaneously instead of one after the other.
+    Per world parameters (mutation_rate, base_health, multiply_delay, food_spawn_interval,
+    max_creatures, creature_spawn_interval) accept a scalar or one value per world.
+    """
+    food_value = 2000
+    food_size = 3
+    sexual_chance = 0.3
+    elite_parents = 5
+
+    def __init__(self, n_worlds: int, width: int = 640, height: int = 480, capacity: int = 128,
+                 food_capacity: int = 256, mutation_rate=DNA.mutation_rate, base_health=Creature.base_health,
+                 multiply_delay=Creature.multiply_delay, food_spawn_interval=1000, max_creatures=100,
+                 creature_spawn_interval=10000, random_spawning: bool = True, seed: int = None):
+        self.n_worlds = n_worlds
+        self.width = width
+        self.height = height
+        self.capacity = capacity
+        self.food_capacity = food_capacity
+        self.random_spawning = random_spawning
+        self.rng = np.random.default_rng(seed)
+
+        self.mutation_rate = _per_world(mutation_rate, n_worlds)
+        self.base_health = _per_world(base_health, n_worlds)
+        self.multiply_delay = _per_world(multiply_delay, n_worlds)
+        self.food_spawn_interval = _per_world(food_spawn_interval, n_worlds)
+        self.creature_spawn_interval = _per_world(creature_spawn_interval, n_worlds)
+        self.max_creatures = _per_world(max_creatures, n_worlds, dtype=np.int64)
+
+        shape = (n_worlds, capacity)
+        self.alive = np.zeros(shape, dtype=bool)
+        # rects are kept as integer left/top and size like pygame.Rect
+        self.left = np.zeros(shape, dtype=np.int32)
+        self.top = np.zeros(shape, dtype=np.int32)
+        self.rect_size = np.ones(shape, dtype=np.int32)
+        self.vision_size = np.ones(shape, dtype=np.int32)
+        self.direction = np.zeros(shape)
+        self.x_acc = np.zeros(shape)
+        self.y_acc = np.zeros(shape)
+        self.speed = np.zeros(shape)
+        self.size = np.zeros(shape)
+        self.vision_radius = np.zeros(shape)
+        self.asexual_chance = np.zeros(shape)
+        self.health = np.zeros(shape)
+        self.multiply_cd = np.zeros(shape)
+        self.direction_change_cd = np.zeros(shape)
+        self.food_consumed = np.zeros(shape, dtype=np.int64)
+        self.age = np.zeros(shape)
+        self.genes = np.zeros(shape + (DNA.gene_length,))
+        self.brain_genes = np.zeros(shape + (BrainDNA.gene_length,))
+        self.input_weights = np.zeros(shape + (Brain.input_neurons, Brain.hidden_neurons))
+        self.hidden_weights = np.zeros(shape + (Brain.hidden_neurons, Brain.output_neurons))
+        self.output_weights = np.zeros(shape + (Brain.output_neurons, 1))
+
+        food_shape = (n_worlds, food_capacity)
+        self.food_alive = np.zeros(food_shape, dtype=bool)
+        self.food_left = np.zeros(food_shape, dtype=np.int32)
+        self.food_top = np.zeros(food_shape, dtype=np.int32)
+        self.food_values = np.zeros(food_shape)
+
+        self.food_spawn_counter = np.zeros(n_worlds)
+        self.creature_spawn_counter = np.zeros(n_worlds)
+        self.births = np.zeros(n_worlds, dtype=np.int64)
+        self.deaths = np.zeros(n_worlds, dtype=np.int64)
+        self.lifespan_total = np.zeros(n_worlds)
+        self.ticks = 0
+
+    @classmethod
+    def from_worlds(cls, worlds: list, capacity: int = None, food_capacity: int = None, **kwargs) -> 'BatchWorld':
+        """copies the BrainCreatures and food of existing worlds (all of the same size) into a batch"""
+        capacity = capacity or 2 * max(max(len(world.creatures) for world in worlds), 1)
+        food_capacity = food_capacity or 2 * max(max(len(world.edibles) for world in worlds), 1)
+        kwargs.setdefault('max_creatures', [world.max_creatures for world in worlds])
+        kwargs.setdefault('food_spawn_interval', [world.food_spawn_interval for world in worlds])
+        kwargs.setdefault('creature_spawn_interval', [world.creature_spawn_interval for world in worlds])
+        batch = cls(len(worlds), worlds[0].width, worlds[0].height, capacity, food_capacity, **kwargs)
+        for w, world in enumerate(worlds):
+            creatures = [creature for creature in world.creatures if isinstance(creature, BrainCreature)]
+            n = len(creatures)
+            slots = np.arange(n)
+            batch._set_creatures(np.full(n, w), slots,
+                                 gene_matrix([creature.dna for creature in creatures], DNA.gene_length),
+                                 gene_matrix([creature.brain.dna for creature in creatures], BrainDNA.gene_length),
+                                 np.array([creature.rect.centerx for creature in creatures]),
+                                 np.array([creature.rect.centery for creature in creatures]),
+                                 np.array([creature.direction for creature in creatures]),
+                                 np.array([creature.health for creature in creatures], dtype=float))
+            batch.multiply_cd[w, slots] = [creature.multiply_cd for creature in creatures]
+            batch.direction_change_cd[w, slots] = [creature.direction_change_cd for creature in creatures]
+            batch.food_consumed[w, slots] = [creature.food_consumed for creature in creatures]
+            batch.x_acc[w, slots] = [creature.x_acc for creature in creatures]
+            batch.y_acc[w, slots] = [creature.y_acc for creature in creatures]
+            for i, food in enumerate(world.edibles[:food_capacity]):
+                batch.food_alive[w, i] = True
+                batch.food_left[w, i] = food.rect.left
+                batch.food_top[w, i] = food.rect.top
+                batch.food_values[w, i] = food.value
+        return batch
+
+    def populate(self, n_creatures: int, n_food: int):
+        """fills every world with n_creatures random creatures and n_food food"""
+        n_creatures = min(n_creatures, self.capacity)
+        worlds = np.repeat(np.arange(self.n_worlds), n_creatures)
+        slots = np.tile(np.arange(n_creatures), self.n_worlds)
+        n = len(worlds)
+        self._set_creatures(worlds, slots, self.rng.uniform(size=(n, DNA.gene_length)),
+                            self.rng.uniform(size=(n, BrainDNA.gene_length)),
+                            self.rng.uniform(0, self.width, n), self.rng.uniform(0, self.height, n),
+                            np.zeros(n), self.base_health[worlds])
+        n_food = min(n_food, self.food_capacity)
+        self.food_alive[:, :n_food] = True
+        self.food_left[:, :n_food] = self.rng.uniform(0, self.width, (self.n_worlds, n_food)) + self.food_size // 2
+        self.food_top[:, :n_food] = self.rng.uniform(0, self.height, (self.n_worlds, n_food)) + self.food_size // 2
+        self.food_values[:, :n_food] = self.food_value
+
+    def _set_creatures(self, worlds, slots, genes, brain_genes, x, y, direction, health):
+        """writes new creatures into the given slots, deriving the phenotype like DnaCreature and Brain"""
+        speed = DnaCreature.min_speed + genes[:, 3] * (DnaCreature.max_speed - DnaCreature.min_speed)
+        size = DnaCreature.min_size + genes[:, 4] * (DnaCreature.max_size - DnaCreature.min_size)
+        asexual_chance = DnaCreature.max_a_multiply + genes[:, 5] * (DnaCreature.min_a_multiply -
+                                                                     DnaCreature.max_a_multiply)
+        vision_radius = size + genes[:, 6] * (DnaCreature.max_vision_radius - size)
+
+        self.alive[worlds, slots] = True
+        self.genes[worlds, slots] = genes
+        self.brain_genes[worlds, slots] = brain_genes
+        self.speed[worlds, slots] = speed
+        self.size[worlds, slots] = size
+        self.asexual_chance[worlds, slots] = asexual_chance
+        self.vision_radius[worlds, slots] = vision_radius
+        self.rect_size[worlds, slots] = size.astype(np.int32)
+        self.vision_size[worlds, slots] = (vision_radius * 2).astype(np.int32)
+        rect_size = self.rect_size[worlds, slots]
+        self.left[worlds, slots] = np.round(x).astype(np.int32) - rect_size // 2
+        self.top[worlds, slots] = np.round(y).astype(np.int32) - rect_size // 2
+        self.direction[worlds, slots] = direction
+        self.health[worlds, slots] = health
+        self.x_acc[worlds, slots] = 0.0
+        self.y_acc[worlds, slots] = 0.0
+        self.multiply_cd[worlds, slots] = self.multiply_delay[worlds]
+        self.direction_change_cd[worlds, slots] = Creature.direction_change_delay
+        self.food_consumed[worlds, slots] = 0
+        self.age[worlds, slots] = 0.0
+
+        weights = Brain.min_weight + brain_genes * (Brain.max_weight - Brain.min_weight)
+        level1_neurons = Brain.input_neurons * Brain.hidden_neurons
+        self.input_weights[worlds, slots] = weights[:, :level1_neurons].reshape(-1, Brain.input_neurons,
+                                                                                Brain.hidden_neurons)
+        self.hidden_weights[worlds, slots] = weights[:, level1_neurons:-Brain.output_neurons]\
+            .reshape(-1, Brain.hidden_neurons, Brain.output_neurons)
+        self.output_weights[worlds, slots] = weights[:, -Brain.output_neurons:].reshape(-1, Brain.output_neurons, 1)
+
+    # helpers
+
+    @property
+    def centerx(self) -> np.ndarray:
+        return self.left + self.rect_size // 2
+
+    @property
+    def centery(self) -> np.ndarray:
+        return self.top + self.rect_size // 2
+
+    def can_multiply(self) -> np.ndarray:
+        return self.alive & (self.multiply_cd <= 0) & (self.health > Creature.min_multiply_health)
+
+    def _mutate(self, genes, worlds):
+        mutate = self.rng.uniform(size=genes.shape) < self.mutation_rate[worlds][:, None]
+        return np.where(mutate, self.rng.uniform(size=genes.shape), genes)
+
+    def _crossover(self, genes, partner_genes):
+        """vectorized DNA.crossover: genes[midpoint:] followed by partner_genes[:midpoint]"""
+        n, length = genes.shape
+        midpoint = self.rng.integers(length, size=(n, 1))
+        index = np.arange(length)
+        from_self = index < length - midpoint
+        return np.where(from_self, np.take_along_axis(genes, np.minimum(index + midpoint, length - 1), axis=1),
+                        np.take_along_axis(partner_genes, np.maximum(index - (length - midpoint), 0), axis=1))
+
+    def _spawn(self, worlds, genes, brain_genes, x, y, direction, health) -> np.ndarray:
+        """puts children into free slots, respecting capacity and max_creatures; returns which were accepted"""
+        accepted = np.zeros(len(worlds), dtype=bool)
+        if len(worlds) == 0:
+            return accepted
+        # rank of every child among the children of its world
+        order = np.argsort(worlds, kind='stable')
+        sorted_worlds = worlds[order]
+        first = np.searchsorted(sorted_worlds, sorted_worlds)
+        rank = np.empty(len(worlds), dtype=np.int64)
+        rank[order] = np.arange(len(worlds)) - first
+
+        free_slots = np.argsort(self.alive, axis=1, kind='stable')
+        n_free = (~self.alive).sum(axis=1)
+        population = self.alive.sum(axis=1)
+        # World.add_creature only refuses children once the population is above max_creatures
+        accepted = (rank < n_free[worlds]) & (population[worlds] + rank <= self.max_creatures[worlds])
+        slots = free_slots[worlds[accepted], rank[accepted]]
+        self._set_creatures(worlds[accepted], slots, genes[accepted], brain_genes[accepted], x[accepted],
+                            y[accepted], direction[accepted], health[accepted])
+        self.births += np.bincount(worlds[accepted], minlength=self.n_worlds)
+        return accepted
+
+    # simulation
+
+    def step(self, dt: float):
+        """advances every world by dt milliseconds"""
+        if self.random_spawning:
+            self._elite_reproduction(dt)
+
+        # a copy: creatures born during this tick already stand where they belong and must not be moved
+        alive = self.alive.copy()
+        cx = self.centerx
+        cy = self.centery
+        old_left = self.left.copy()
+        old_top = self.top.copy()
+        can_multiply = self.can_multiply()
+        # free slots are reused lowest first, so the pairwise tests only need the leading slots
+        n = _span(alive)
+        n_food = _span(self.food_alive)
+
+        self._think(alive & (self.direction_change_cd <= 0), cx, cy, n, n_food)
+        new_left, new_top = self._move(dt)
+        self._eat(old_left, old_top, n, n_food)
+        self._reproduce(dt, can_multiply, old_left, old_top, cx, cy, n)
+
+        self.direction_change_cd = np.maximum(0, self.direction_change_cd - dt)
+        self.multiply_cd = np.maximum(0, self.multiply_cd - dt)
+        self.health -= ((np.maximum(8.0, self.size / 2) ** 3) * (self.speed ** 2) + self.vision_radius) * dt * 0.00005
+        self.left = np.where(alive, new_left, self.left)
+        self.top = np.where(alive, new_top, self.top)
+        self.age += dt * self.alive
+
+        dead = self.alive & (self.health <= 0)
+        self.deaths += dead.sum(axis=1)
+        self.lifespan_total += (self.age * dead).sum(axis=1)
+        self.alive &= ~dead
+
+        self._spawn_food(dt)
+        self.ticks += 1
+
+    def _think(self, deciding, cx, cy, n, n_food):
+        """target search and brain forward pass for every creature that may change direction"""
+        if not deciding.any():
+            return
+        deciding = deciding[:, :n]
+        cx = cx[:, :n, None]
+        cy = cy[:, :n, None]
+        vision_size = self.vision_size[:, :n, None]
+        vision_left = cx - vision_size // 2
+        vision_top = cy - vision_size // 2
+        vision_radius = self.vision_radius[:, :n]
+
+        # closest food inside the vision rect, distances are compared squared
+        if n_food:
+            food_left = self.food_left[:, None, :n_food]
+            food_top = self.food_top[:, None, :n_food]
+            sees_food = _collide(vision_left, vision_top, vision_size, vision_size, food_left, food_top,
+                                 self.food_size, self.food_size) & self.food_alive[:, None, :n_food]
+            food_dx = food_left + self.food_size // 2 - cx
+            food_dy = food_top + self.food_size // 2 - cy
+            food_dist = np.where(sees_food, food_dx * food_dx + food_dy * food_dy, np.iinfo(np.int32).max)
+            closest_food = food_dist.argmin(axis=2)[:, :, None]
+            has_food = np.take_along_axis(sees_food, closest_food, axis=2)[:, :, 0]
+            food_target_dx = np.take_along_axis(food_dx, closest_food, axis=2)[:, :, 0]
+            food_target_dy = np.take_along_axis(food_dy, closest_food, axis=2)[:, :, 0]
+        else:
+            # no food left in any world
+            has_food = np.zeros(deciding.shape, dtype=bool)
+            food_target_dx = food_target_dy = 0
+
+        # otherwise the closest other creature inside the vision rect
+        left = self.left[:, None, :n]
+        top = self.top[:, None, :n]
+        rect_size = self.rect_size[:, None, :n]
+        sees_creature = _collide(vision_left, vision_top, vision_size, vision_size, left, top, rect_size,
+                                 rect_size) & self.alive[:, None, :n]
+        sees_creature &= ~np.eye(n, dtype=bool)
+        creature_dx = left + rect_size // 2 - cx
+        creature_dy = top + rect_size // 2 - cy
+        creature_dist = np.where(sees_creature, creature_dx * creature_dx + creature_dy * creature_dy,
+                                 np.iinfo(np.int32).max)
+        closest_creature = creature_dist.argmin(axis=2)[:, :, None]
+        has_creature = np.take_along_axis(sees_creature, closest_creature, axis=2)[:, :, 0]
+
+        target_dx = np.where(has_food, food_target_dx,
+                             np.take_along_axis(creature_dx, closest_creature, axis=2)[:, :, 0])
+        target_dy = np.where(has_food, food_target_dy,
+                             np.take_along_axis(creature_dy, closest_creature, axis=2)[:, :, 0])
+        has_target = has_food | has_creature
+
+        values = np.zeros(deciding.shape + (Brain.input_neurons,))
+        values[..., 0] = np.where(has_target, vision_radius / _stick_to_edge(target_dx, -1, 1), 0)
+        values[..., 1] = np.where(has_target, vision_radius / _stick_to_edge(target_dy, -1, 1), 0)
+        values[..., 2] = np.where(has_food, 1, np.where(has_creature, -1, 0))
+
+        input_layer = Brain.sigmoid(np.einsum('wci,wcij->wcj', values, self.input_weights[:, :n]))
+        hidden_layer = Brain.sigmoid(np.einsum('wci,wcij->wcj', input_layer, self.hidden_weights[:, :n]))
+        output = Brain.sigmoid(np.einsum('wci,wcij->wcj', hidden_layer, self.output_weights[:, :n]))[..., 0]
+        direction = output * 2 * pi
+
+        # BrainCreature.do_movement only restarts the cooldown when the direction stays the same
+        unchanged = deciding & (self.direction[:, :n] == direction)
+        self.direction[:, :n] = np.where(deciding, direction, self.direction[:, :n])
+        self.direction_change_cd[:, :n][unchanged] = Creature.direction_change_delay
+
+    def _velocity(self, dt):
+        """vectorized Creature.get_velocity"""
+        vel_x = self.speed / 50 * np.cos(self.direction) * dt + self.x_acc
+        vel_y = self.speed / 50 * np.sin(self.direction) * dt + self.y_acc
+        self.x_acc = vel_x - np.trunc(vel_x)
+        self.y_acc = vel_y - np.trunc(vel_y)
+        return np.trunc(vel_x).astype(np.int32), np.trunc(vel_y).astype(np.int32)
+
+    def _move(self, dt):
+        vel_x, vel_y = self._velocity(dt)
+        new_left = self.left + vel_x
+        new_top = self.top + vel_y
+        outside = self.alive & ((new_left < 0) | (new_top < 0) | (new_left + self.rect_size > self.width) |
+                                (new_top + self.rect_size > self.height))
+        bounce = outside & (self.direction_change_cd <= 0)
+        if bounce.any():
+            turned = np.fmod(self.direction + self.rng.uniform(0, pi, self.direction.shape), 2 * pi)
+            self.direction = np.where(bounce, turned, self.direction)
+            x_acc, y_acc = self.x_acc, self.y_acc
+            bounce_x, bounce_y = self._velocity(dt)
+            self.x_acc = np.where(bounce, self.x_acc, x_acc)
+            self.y_acc = np.where(bounce, self.y_acc, y_acc)
+            new_left = np.where(bounce, self.left + bounce_x, new_left)
+            new_top = np.where(bounce, self.top + bounce_y, new_top)
+            self.direction_change_cd = np.where(bounce, Creature.direction_change_delay, self.direction_change_cd)
+        new_left = np.clip(new_left, 0, np.maximum(self.width - self.rect_size, 0)).astype(np.int32)
+        new_top = np.clip(new_top, 0, np.maximum(self.height - self.rect_size, 0)).astype(np.int32)
+        return new_left, new_top
+
+    def _eat(self, left, top, n, n_food):
+        """every food goes to the first creature touching it"""
+        rect_size = self.rect_size[:, :n, None]
+        touching = _collide(left[:, :n, None], top[:, :n, None], rect_size, rect_size,
+                            self.food_left[:, None, :n_food], self.food_top[:, None, :n_food],
+                            self.food_size, self.food_size)
+        touching &= self.alive[:, :n, None] & self.food_alive[:, None, :n_food]
+        eaten = touching.any(axis=1)
+        if not eaten.any():
+            return
+        eater = touching.argmax(axis=1)
+        worlds, food = np.nonzero(eaten)
+        np.add.at(self.food_consumed, (worlds, eater[worlds, food]), 1)
+        np.add.at(self.health, (worlds, eater[worlds, food]), self.food_values[worlds, food])
+        self.food_alive[worlds, food] = False
+
+    def _reproduce(self, dt, can_multiply, left, top, cx, cy, n):
+        # sexual: every fertile creature may breed with the first fertile creature it touches
+        rect_size = self.rect_size[:, :n]
+        touching = _collide(left[:, :n, None], top[:, :n, None], rect_size[:, :, None], rect_size[:, :, None],
+                            left[:, None, :n], top[:, None, :n], rect_size[:, None, :], rect_size[:, None, :])
+        touching &= can_multiply[:, :n, None] & can_multiply[:, None, :n]
+        touching &= ~np.eye(n, dtype=bool)
+        has_partner = touching.any(axis=2) & (self.rng.uniform(size=(self.n_worlds, n)) < self.sexual_chance)
+        worlds, parents = np.nonzero(has_partner)
+        partners = touching.argmax(axis=2)[worlds, parents]
+        if len(worlds):
+            health = self.health
+            self_donation = np.minimum(health[worlds, parents] * 0.25 + 500, health[worlds, parents])
+            np.subtract.at(health, (worlds, parents), self_donation)
+            partner_donation = np.minimum(self_donation, health[worlds, partners])
+            np.subtract.at(health, (worlds, partners), partner_donation)
+            self.multiply_cd[worlds, parents] = self.multiply_delay[worlds]
+            genes = self._mutate(self._crossover(self.genes[worlds, parents], self.genes[worlds, partners]), worlds)
+            brain_genes = self._mutate(self._crossover(self.brain_genes[worlds, parents],
+                                                       self.brain_genes[worlds, partners]), worlds)
+            self._spawn(worlds, genes, brain_genes, cx[worlds, parents], cy[worlds, parents],
+                        np.fmod(self.direction[worlds, parents] + pi, 2 * pi), self_donation + partner_donation)
+
+        # asexual, decided on the fertility from the start of the tick like Creature.creature_interaction
+        asexual = can_multiply & (self.rng.uniform(size=self.alive.shape) < self.asexual_chance * dt / 1000)
+        self._asexual_multiply(*np.nonzero(asexual), cx, cy)
+
+    def _asexual_multiply(self, worlds, parents, cx, cy):
+        if len(worlds) == 0:
+            return
+        child_health = np.minimum(self.health[worlds, parents] * 0.5 + 1000, self.health[worlds, parents])
+        self.health[worlds, parents] -= child_health
+        self.multiply_cd[worlds, parents] = self.multiply_delay[worlds]
+        self._spawn(worlds, self._mutate(self.genes[worlds, parents], worlds),
+                    self._mutate(self.brain_genes[worlds, parents], worlds), cx[worlds, parents],
+                    cy[worlds, parents], np.fmod(self.direction[worlds, parents] + pi, 2 * pi), child_health)
+
+    def _elite_reproduction(self, dt):
+        """World.elite_reproduction: the creatures that ate the most reproduce asexually"""
+        self.creature_spawn_counter += dt
+        due = self.creature_spawn_counter > self.creature_spawn_interval
+        if not due.any():
+            return
+        self.creature_spawn_counter[due] = 0
+        ranking = np.argsort(np.where(self.alive, -self.food_consumed, np.iinfo(np.int64).max), axis=1,
+                             kind='stable')[:, :self.elite_parents]
+        elite = np.take_along_axis(self.alive, ranking, axis=1) & due[:, None]
+        worlds, ranks = np.nonzero(elite)
+        self._asexual_multiply(worlds, ranking[worlds, ranks], self.centerx, self.centery)
+
+    def _spawn_food(self, dt):
+        self.food_spawn_counter += dt
+        due = self.food_spawn_counter > self.food_spawn_interval
+        if not due.any():
+            return
+        self.food_spawn_counter[due] = 0
+        has_room = due & ~self.food_alive.all(axis=1)
+        worlds = np.nonzero(has_room)[0]
+        slots = (~self.food_alive[worlds]).argmax(axis=1)
+        self.food_alive[worlds, slots] = True
+        self.food_left[worlds, slots] = self.rng.uniform(0, self.width, len(worlds)) + self.food_size // 2
+        self.food_top[worlds, slots] = self.rng.uniform(0, self.height, len(worlds)) + self.food_size // 2
+        self.food_values[worlds, slots] = self.food_value
+
+    def run(self, ticks: int, dt: float = 1000 / 60):
+        for _ in range(ticks):
+            self.step(dt)
+
+    def metrics(self) -> dict:
+        """per world summary, every value is an array with one entry per world"""
+        population = self.alive.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_genes = (self.genes * self.alive[:, :, None]).sum(axis=1) / population[:, None]
+            return {
+                'population': population,
+                'food': self.food_alive.sum(axis=1),
+                'births': self.births.copy(),
+                'deaths': self.deaths.copy(),
+                'avg_food_consumed': (self.food_consumed * self.alive).sum(axis=1) / population,
+                'avg_lifespan': self.lifespan_total / self.deaths,
+                'avg_age': (self.age * self.alive).sum(axis=1) / population,
+                'mean_genes': mean_genes,
+            }
+
+
+if __name__ == '__main__':
+    # self-check: children appear where their parents stand, worlds without food keep running
+    batch = BatchWorld(2, 640, 480, capacity=16)
+    n = 3
+    worlds = np.repeat(np.arange(batch.n_worlds), n)
+    slots = np.tile(np.arange(n), batch.n_worlds)
+    genes = np.full((len(worlds), DNA.gene_length), 0.5)
+    batch._set_creatures(worlds, slots, genes, np.full((len(worlds), BrainDNA.gene_length), 0.5),
+                         np.full(len(worlds), 300.0), np.full(len(worlds), 200.0), np.zeros(len(worlds)),
+                         np.full(len(worlds), 10.0 ** 5))
+    batch.multiply_cd[:] = 0
+    batch.sexual_chance = 1
+    batch.step(1000 / 60)
+    children = batch.alive.copy()
+    children[:, :n] = False
+    assert children.any(), "no children were born"
+    assert (np.abs(batch.centerx[children] - 300) <= 5).all() and (np.abs(batch.centery[children] - 200) <= 5).all(), \
+        f"children at {batch.centerx[children]}, {batch.centery[children]} instead of next to their parents"
+
+    batch = BatchWorld(3, 200, 200)
+    batch.populate(4, 0)
+    batch.food_spawn_interval[:] = np.inf
+    batch.run(60)
+    print("batch world self-check passed")
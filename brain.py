@@ -1,6 +1,6 @@
 # https://towardsdatascience.com/how-to-build-your-own-neural-network-from-scratch-in-python-68998a08e4f6
 
-from dna import BrainDNA
+from dna import BrainDNA, gene_matrix
 import numpy as np
 import math
 import auxiliary
@@ -19,10 +19,51 @@ class Brain:
     output_neurons = 4
     min_weight = -1
     max_weight = 1
+    # set to compile every brain into a DirectionTable of this resolution at birth,
+    # directions are then looked up instead of computed (see DirectionTable.error)
+    lookup_resolution = None
+    lookup_interpolation = 'linear'
+    table = None
 
     def __init__(self, dna: BrainDNA = BrainDNA()):
         self.dna = dna
-        weights = np.array([auxiliary.map(gene, 0, 1, self.min_weight, self.max_weight) for gene in dna.genes])
+        self.set_weights(auxiliary.map(np.asarray(dna.genes, dtype=float), 0, 1, self.min_weight, self.max_weight))
+        if self.lookup_resolution:
+            self.compile_table()
+
+    @classmethod
+    def many(cls, dnas: list) -> list:
+        """one brain per dna, with the genes of all of them mapped to weights at once"""
+        n = len(dnas)
+        weights = auxiliary.map(gene_matrix(dnas, BrainDNA.gene_length), 0, 1, cls.min_weight, cls.max_weight)
+        level1_neurons = cls.input_neurons * cls.hidden_neurons
+        input_weights = weights[:, :level1_neurons].reshape(n, cls.input_neurons, cls.hidden_neurons)
+        hidden_weights = weights[:, level1_neurons:-cls.output_neurons]\
+            .reshape(n, cls.hidden_neurons, cls.output_neurons)
+        output_weights = weights[:, -cls.output_neurons:].reshape(n, cls.output_neurons, 1)
+        # the layers are replaced, never written to, so all brains can start with the same one
+        layer = np.zeros((1, cls.hidden_neurons))
+        tables = {}
+        brains = []
+        for i, dna in enumerate(dnas):
+            brain = cls.__new__(cls)
+            brain.dna = dna
+            # copies, a view would keep the weights of the whole batch alive as long as one brain lives
+            brain.input_weights = input_weights[i].copy()
+            brain.hidden_weights = hidden_weights[i].copy()
+            brain.output_weights = output_weights[i].copy()
+            brain.input_layer = layer
+            brain.hidden_layer = layer
+            if cls.lookup_resolution:
+                # brains of the same dna object are the same, so is their table
+                if id(dna) not in tables:
+                    brain.compile_table()
+                    tables[id(dna)] = brain.table
+                brain.table = tables[id(dna)]
+            brains.append(brain)
+        return brains
+
+    def set_weights(self, weights: np.ndarray):
         level1_neurons = self.input_neurons * self.hidden_neurons
         self.input_weights = np.array(weights[0:level1_neurons]).reshape(self.input_neurons, self.hidden_neurons)
         self.hidden_weights = np.array(weights[level1_neurons:-self.output_neurons])\
@@ -32,6 +73,13 @@ class Brain:
         self.input_layer = np.zeros((1, self.hidden_neurons))
         self.hidden_layer = np.zeros((1, self.hidden_neurons))
 
+    def compile_table(self, resolution: int = None, interpolation: str = None):
+        self.table = DirectionTable(self, resolution or self.lookup_resolution or 32,
+                                    interpolation or self.lookup_interpolation)
+        # feedforward keeps the layers of the last batch around
+        self.input_layer = np.zeros((1, self.hidden_neurons))
+        self.hidden_layer = np.zeros((1, self.hidden_neurons))
+
     def back_propagate(self, values, y):
         output = self.feedforward(values)
 
@@ -78,6 +126,8 @@ class Brain:
         max_weight = max(weights)
         min_weight = min(weights)
         self.dna.genes = np.array([auxiliary.map(weight, min_weight, max_weight, 0, 1) for weight in weights])
+        if self.table is not None:
+            self.compile_table(self.table.resolution, self.table.interpolation)
 
     @classmethod
     def get_number_of_neurons(cls):
@@ -103,3 +153,112 @@ class Brain:
         s = cls.sigmoid(x)
         ds = s * (1 - s)
         return ds
+
+
+class DirectionTable:
+    """
+    Directions of one brain precomputed over its input domain
+
+    BrainCreature feeds the brain two direction terms vision_radius / dx and
+    vision_radius / dy (|dx|, |dy| >= 1) and a target type of -1, 0 or 1. Type 0
+    means no target and all inputs 0, that is a single direction. For the other
+    types the table holds a grid for each sign of both terms, sampled uniformly
+    in 1 / term, that is in target distance, for min_input <= |term| <= max_input.
+    Terms outside that range are clamped.
+    """
+    interpolations = ('linear', 'nearest')
+
+    def __init__(self, brain: Brain, resolution: int = 32, interpolation: str = 'linear', min_input: float = 0.25,
+                 max_input: float = 150.0):
+        if interpolation not in self.interpolations:
+            raise ValueError(f"unknown interpolation: {interpolation}")
+        self.resolution = resolution
+        self.interpolation = interpolation
+        self.low = 1 / max_input
+        self.high = 1 / min_input
+        self.scale = resolution / (self.high - self.low)
+
+        n = resolution + 1
+        magnitudes = 1 / np.linspace(self.low, self.high, n)
+        grid_x, grid_y = (grid.ravel() for grid in np.meshgrid(magnitudes, magnitudes, indexing='ij'))
+        # ordered like the index in direction(): target type, sign of x, sign of y
+        values = np.concatenate([np.column_stack((sign_x * grid_x, sign_y * grid_y, np.full(n * n, target_type)))
+                                 for target_type in (-1, 1) for sign_x in (-1, 1) for sign_y in (-1, 1)])
+        # float32 rounding is far below the interpolation error
+        self.directions = brain.get_direction(values).ravel().astype(np.float32)
+        self.idle = brain.get_direction(np.zeros(brain.input_neurons)).item()
+
+    def _position(self, value: float) -> float:
+        reciprocal = 1 / abs(value) if value else self.high
+        return (min(max(reciprocal, self.low), self.high) - self.low) * self.scale
+
+    def direction(self, x: float, y: float, target_type: float) -> float:
+        if not target_type:
+            return self.idle
+        n = self.resolution + 1
+        base = ((target_type > 0) * 4 + (x > 0) * 2 + (y > 0)) * n * n
+        u = self._position(x)
+        v = self._position(y)
+        item = self.directions.item
+        if self.interpolation == 'nearest':
+            return item(base + round(u) * n + round(v))
+        i = min(int(u), self.resolution - 1)
+        j = min(int(v), self.resolution - 1)
+        u -= i
+        v -= j
+        index = base + i * n + j
+        return ((item(index) * (1 - v) + item(index + 1) * v) * (1 - u) +
+                (item(index + n) * (1 - v) + item(index + n + 1) * v) * u)
+
+    def error(self, brain: Brain, samples: int = 10000, vision_radius: tuple = (50, 150), seed: int = 0) -> dict:
+        """
+        :return: absolute difference in radians between the table and brain.feedforward
+                 for random targets within a vision radius drawn from vision_radius
+        """
+        rng = np.random.default_rng(seed)
+        radius = rng.uniform(*vision_radius, samples)
+        offsets = np.rint(rng.uniform(-1.2, 1.2, (samples, 2)) * radius[:, None])
+        # auxiliary.stick_to_edge(offset, -1, 1)
+        offsets = np.where(np.abs(offsets) <= 1, np.where(offsets > 0, 1, -1), offsets)
+        values = np.column_stack((radius[:, None] / offsets, rng.choice((-1, 1), samples)))
+        exact = brain.get_direction(values.copy()).ravel()
+        brain.input_layer = np.zeros((1, brain.hidden_neurons))
+        brain.hidden_layer = np.zeros((1, brain.hidden_neurons))
+        looked_up = np.array([self.direction(*row) for row in values.tolist()])
+        difference = np.abs(exact - looked_up)
+        return {
+            'max': float(difference.max()),
+            'mean': float(difference.mean()),
+            'rms': float(np.sqrt((difference ** 2).mean())),
+            'p99': float(np.percentile(difference, 99)),
+        }
+
+
+if __name__ == '__main__':
+    # accuracy and speed of the lookup tables for a few random brains
+    import time
+    brains = [Brain(BrainDNA()) for _ in range(20)]
+    inputs = [np.array([random.choice((-1, 1)) * random.uniform(0.5, 150),
+                        random.choice((-1, 1)) * random.uniform(0.5, 150), random.choice((-1, 1))])
+              for _ in range(2000)]
+    started = time.perf_counter()
+    for brain in brains:
+        for values in inputs:
+            brain.get_direction(values).item()
+    exact_time = (time.perf_counter() - started) / (len(brains) * len(inputs))
+    print(f"feedforward: {exact_time * 1e6:.2f} us per decision")
+    for interpolation in DirectionTable.interpolations:
+        for resolution in (8, 16, 32, 64, 128):
+            started = time.perf_counter()
+            tables = [DirectionTable(brain, resolution, interpolation) for brain in brains]
+            compile_time = (time.perf_counter() - started) / len(brains)
+            errors = [table.error(brain, samples=2000) for table, brain in zip(tables, brains)]
+            started = time.perf_counter()
+            for table in tables:
+                for values in inputs:
+                    table.direction(*values.tolist())
+            lookup_time = (time.perf_counter() - started) / (len(tables) * len(inputs))
+            print(f"{interpolation:7} {resolution:4}: compile {compile_time * 1e3:6.2f} ms, "
+                  f"{tables[0].directions.nbytes / 1024:6.1f} KiB, lookup {lookup_time * 1e6:.2f} us, "
+                  f"error mean {np.mean([e['mean'] for e in errors]):.4f} "
+                  f"p99 {np.mean([e['p99'] for e in errors]):.4f} max {max(e['max'] for e in errors):.4f} rad")
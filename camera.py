@@ -0,0 +1,90 @@
+import pygame
+
+
+class Camera:
+    """
+    Maps world coordinates to the window: (x, y) is the world position shown
+    in the top left corner of the view and zoom is screen pixels per world unit
+    """
+    min_zoom = 0.01
+    max_zoom = 8.0
+    zoom_step = 1.1
+    pan_step = 40  # screen pixels per arrow key press
+    # labels (health, food, fertility) are skipped below this zoom
+    label_min_zoom = 0.6
+
+    def __init__(self, view_width: int, view_height: int, x: float = 0.0, y: float = 0.0, zoom: float = 1.0):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.x = x
+        self.y = y
+        self.zoom = zoom
+        self._dragging = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_dragging'] = False
+        return state
+
+    @property
+    def view_rect(self) -> pygame.Rect:
+        """part of the world that is visible, in world coordinates"""
+        return pygame.Rect(int(self.x), int(self.y), int(self.view_width / self.zoom) + 2,
+                           int(self.view_height / self.zoom) + 2)
+
+    @property
+    def draw_labels(self) -> bool:
+        return self.zoom >= self.label_min_zoom
+
+    def to_screen(self, x: float, y: float) -> tuple:
+        return int((x - self.x) * self.zoom), int((y - self.y) * self.zoom)
+
+    def rect_to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        return pygame.Rect(int((rect.left - self.x) * self.zoom), int((rect.top - self.y) * self.zoom),
+                           max(1, int(rect.width * self.zoom)), max(1, int(rect.height * self.zoom)))
+
+    def to_world(self, screen_x: float, screen_y: float) -> tuple:
+        return self.x + screen_x / self.zoom, self.y + screen_y / self.zoom
+
+    def pan(self, dx: float, dy: float):
+        """moves the view by (dx, dy) screen pixels"""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+
+    def zoom_at(self, factor: float, screen_x: float, screen_y: float):
+        """zooms keeping the world point under (screen_x, screen_y) in place"""
+        world_x, world_y = self.to_world(screen_x, screen_y)
+        self.zoom = min(self.max_zoom, max(self.min_zoom, self.zoom * factor))
+        self.x = world_x - screen_x / self.zoom
+        self.y = world_y - screen_y / self.zoom
+
+    def fit(self, bounds: pygame.Rect):
+        """zooms out so that the whole of bounds is visible"""
+        self.zoom = min(self.max_zoom, max(self.min_zoom, min(self.view_width / bounds.width,
+                                                              self.view_height / bounds.height)))
+        self.x = bounds.centerx - self.view_width / self.zoom / 2
+        self.y = bounds.centery - self.view_height / self.zoom / 2
+
+    def handle_event(self, event):
+        """arrow keys / dragging with the mouse pan, mouse wheel and +/- zoom"""
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom_at(self.zoom_step ** event.y, *pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self._dragging = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self._dragging = False
+        elif event.type == pygame.MOUSEMOTION and self._dragging:
+            self.pan(-event.rel[0], -event.rel[1])
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_LEFT:
+                self.pan(-self.pan_step, 0)
+            elif event.key == pygame.K_RIGHT:
+                self.pan(self.pan_step, 0)
+            elif event.key == pygame.K_UP:
+                self.pan(0, -self.pan_step)
+            elif event.key == pygame.K_DOWN:
+                self.pan(0, self.pan_step)
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.zoom_at(self.zoom_step, self.view_width / 2, self.view_height / 2)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.zoom_at(1 / self.zoom_step, self.view_width / 2, self.view_height / 2)
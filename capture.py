@@ -0,0 +1,100 @@
+import os
+import queue
+import threading
+import logging
+import numpy as np
+import pygame
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCapture:
+    """
+    Grabs the world surface every `every` ticks and hands the frames to a background
+    writer thread through a bounded queue, so encoding never runs in the simulation loop
+
+    formats:
+      'png', 'bmp', 'tga', 'jpg' - one image per frame, frame_000000.png, ... in `path`
+      'ppm' - one binary PPM per frame in `path`, no encoding cost at all
+      'raw' - all frames appended to the single file `path` as rgb24, e.g.
+              ffmpeg -f rawvideo -pix_fmt rgb24 -s WIDTHxHEIGHT -r 30 -i run.raw run.mp4
+
+    When the queue is full the frame is dropped (counted in `dropped`) unless block is True.
+    """
+    image_formats = ('png', 'bmp', 'tga', 'jpg')
+
+    def __init__(self, path: str, every: int = 10, format: str = 'png', queue_size: int = 64, block: bool = False):
+        if format not in self.image_formats + ('ppm', 'raw'):
+            raise ValueError(f"unknown capture format: {format}")
+        self.path = path
+        self.every = every
+        self.format = format
+        self.block = block
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.size = None
+        self._raw_file = None
+
+        if format == 'raw':
+            self._raw_file = open(path, mode='wb')
+        else:
+            os.makedirs(path, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_frames, name='frame-writer', daemon=True)
+        self._writer.start()
+
+    def due(self, tick: int) -> bool:
+        return tick % self.every == 0
+
+    def grab(self, surface: pygame.Surface):
+        # array3d copies the pixels, the surface can be drawn over right away
+        frame = pygame.surfarray.array3d(surface)
+        if self.size is None:
+            self.size = surface.get_size()
+        try:
+            self.frames.put((self.captured, frame), block=self.block)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.captured += 1
+
+    def _write_frames(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                self.frames.task_done()
+                return
+            index, frame = item
+            try:
+                self._write(index, frame)
+                self.written += 1
+            except Exception:
+                logger.exception(f"writing frame {index} failed")
+            self.frames.task_done()
+
+    def _write(self, index: int, frame: np.ndarray):
+        if self.format == 'raw':
+            # surfarray is indexed [x, y], video rows are y
+            self._raw_file.write(np.ascontiguousarray(frame.swapaxes(0, 1)).tobytes())
+        elif self.format == 'ppm':
+            width, height = frame.shape[:2]
+            with open(os.path.join(self.path, f"frame_{index:06d}.ppm"), mode='wb') as file_handle:
+                file_handle.write(f"P6 {width} {height} 255\n".encode())
+                file_handle.write(np.ascontiguousarray(frame.swapaxes(0, 1)).tobytes())
+        else:
+            pygame.image.save(pygame.surfarray.make_surface(frame),
+                              os.path.join(self.path, f"frame_{index:06d}.{self.format}"))
+
+    def close(self):
+        """waits for the queued frames to be written"""
+        if self._writer.is_alive():
+            self.frames.put(None)
+            self._writer.join()
+        if self._raw_file is not None:
+            self._raw_file.close()
+            self._raw_file = None
+            if self.size is not None:
+                logger.info(f"raw video {self.path}: {self.written} frames of {self.size[0]}x{self.size[1]} rgb24")
+        if self.dropped:
+            logger.info(f"frame capture dropped {self.dropped} frames")
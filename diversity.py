@@ -0,0 +1,147 @@
+import logging
+import numpy as np
+from dna import BrainDNA, DNA
+
+logger = logging.getLogger(__name__)
+
+
+def genome(creature) -> np.ndarray:
+    """DNA genes followed by BrainDNA genes, NaN for the parts a creature doesn't have"""
+    vector = np.full(DNA.gene_length + BrainDNA.gene_length, np.nan)
+    dna = getattr(creature, 'dna', None)
+    brain = getattr(creature, 'brain', None)
+    if dna is not None:
+        vector[:DNA.gene_length] = dna.genes
+    if brain is not None:
+        vector[DNA.gene_length:] = brain.dna.genes
+    return vector
+
+
+class Diversity:
+    """
+    Genetic diversity of a world's population
+
+    Per gene means and variances are kept up to date on every birth and death from
+    running sums. Every `cluster_every` ticks the population is grouped into species
+    with leader clustering: a creature joins the first species whose leader genome is
+    within threshold * sqrt(number of genes) (euclidean), that is a root mean square
+    difference of `threshold` per gene, otherwise it leads a new species. Leaders are
+    kept between clusterings, so species ids stay stable while they live.
+
+    Two random genomes differ by about 0.41 per gene. There are at most `max_leaders`
+    species, once they exist the remaining creatures join the closest one, so a
+    clustering costs O(population * max_leaders).
+    """
+    def __init__(self, threshold: float = 0.3, cluster_every: int = 300, max_leaders: int = 64):
+        self.threshold = threshold
+        self.cluster_every = cluster_every
+        self.max_leaders = max_leaders
+        length = DNA.gene_length + BrainDNA.gene_length
+        self.count = 0
+        self.sum = np.zeros(length)
+        self.sum_squares = np.zeros(length)
+
+        self.species = {}  # species id -> number of members
+        self._leaders = np.empty((0, length))
+        self._leader_ids = np.empty(0, dtype=np.int64)
+        self._next_species_id = 1
+
+    def start(self, world):
+        self.count = 0
+        self.sum[:] = 0
+        self.sum_squares[:] = 0
+        for creature in world.creatures:
+            self.birth(creature)
+        self.cluster(world)
+
+    def birth(self, creature):
+        genes = np.nan_to_num(genome(creature))
+        self.count += 1
+        self.sum += genes
+        self.sum_squares += genes * genes
+
+    def death(self, creature):
+        genes = np.nan_to_num(genome(creature))
+        self.count -= 1
+        self.sum -= genes
+        self.sum_squares -= genes * genes
+
+    def tick(self, world):
+        if world.ticks % self.cluster_every == 0:
+            self.cluster(world)
+
+    @property
+    def mean(self) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros_like(self.sum)
+        return self.sum / self.count
+
+    @property
+    def variance(self) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros_like(self.sum)
+        # removing creatures can leave tiny negative rounding errors
+        return np.maximum(self.sum_squares / self.count - self.mean ** 2, 0)
+
+    @property
+    def gene_diversity(self) -> float:
+        """mean standard deviation over all genes, 0 for a population of clones"""
+        return float(np.sqrt(self.variance).mean())
+
+    def cluster(self, world) -> np.ndarray:
+        """:return: species id of every creature in world.creatures"""
+        if not world.creatures:
+            self.species = {}
+            return np.empty(0, dtype=np.int64)
+        genomes = np.nan_to_num(np.array([genome(creature) for creature in world.creatures]))
+        # resynchronise the running sums, they drift a little over millions of updates
+        self.count = len(genomes)
+        self.sum = genomes.sum(axis=0)
+        self.sum_squares = (genomes * genomes).sum(axis=0)
+
+        radius = self.threshold * np.sqrt(genomes.shape[1])
+        labels = np.zeros(len(genomes), dtype=np.int64)
+        unassigned = np.ones(len(genomes), dtype=bool)
+        leaders = []
+        leader_ids = []
+        # existing species first, in order of creation
+        for leader, species_id in zip(self._leaders, self._leader_ids):
+            members = unassigned & (np.linalg.norm(genomes - leader, axis=1) <= radius)
+            if members.any():
+                labels[members] = species_id
+                unassigned &= ~members
+                leaders.append(leader)
+                leader_ids.append(species_id)
+        # the first creature that fits no species founds a new one
+        while unassigned.any() and len(leaders) < self.max_leaders:
+            leader = genomes[np.argmax(unassigned)]
+            members = unassigned & (np.linalg.norm(genomes - leader, axis=1) <= radius)
+            labels[members] = self._next_species_id
+            unassigned &= ~members
+            leaders.append(leader)
+            leader_ids.append(self._next_species_id)
+            self._next_species_id += 1
+        leaders = np.array(leaders).reshape(-1, genomes.shape[1])
+        leader_ids = np.array(leader_ids, dtype=np.int64)
+        # no room for more species, the rest joins the closest one
+        if unassigned.any():
+            rest = genomes[unassigned]
+            distances = ((rest * rest).sum(axis=1)[:, None] + (leaders * leaders).sum(axis=1)[None, :] -
+                         2 * rest @ leaders.T)
+            labels[unassigned] = leader_ids[distances.argmin(axis=1)]
+
+        self._leaders = leaders
+        self._leader_ids = leader_ids
+        ids, counts = np.unique(labels, return_counts=True)
+        self.species = dict(zip(ids.tolist(), counts.tolist()))
+        return labels
+
+    def summary(self) -> dict:
+        return {
+            'population': self.count,
+            'gene_diversity': self.gene_diversity,
+            'species': len(self.species),
+            'largest_species': max(self.species.values(), default=0),
+            'mean': self.mean,
+            'variance': self.variance,
+        }
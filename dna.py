@@ -20,21 +20,92 @@ logger = logging.getLogger(__name__)
 
 # TO DO:
 
+def code_dtype(quantization) -> np.dtype:
+    """little-endian dtype of the integer codes of a quantization (np.uint8 / np.uint16)"""
+    return np.dtype(f'<u{np.dtype(quantization).itemsize}')
+
+
+def encode(genes, dtype: np.dtype) -> np.ndarray:
+    """:return: nearest integer codes of genes in [0, 1]"""
+    return np.rint(np.clip(np.asarray(genes, dtype=float), 0, 1) * np.iinfo(dtype).max).astype(dtype)
+
+
+def gene_matrix(dnas: list, gene_length: int) -> np.ndarray:
+    """:return: (len(dnas), gene_length) genes, decoding quantized genomes in one go"""
+    codes = [dna.codes for dna in dnas]
+    if codes and all(code is not None and len(code) == len(codes[0]) for code in codes):
+        dtype = np.dtype(f'<u{len(codes[0]) // gene_length}')
+        return np.frombuffer(b''.join(codes), dtype=dtype).reshape(len(dnas), gene_length) / np.iinfo(dtype).max
+    return np.array([dna.genes for dna in dnas], dtype=float).reshape(len(dnas), gene_length)
+
+
 # a class to store genetic information of a member of population
 # genotype
 class DNA:
     mutation_rate = 0.05  # probability of gene mutation
     # gene_length = 6  # first 3 genes: r, g, b (color), gene[4] - speed, gene[5] - size
     gene_length = 7
+    # None keeps genes as a float64 array; np.uint8 or np.uint16 keeps them as integer
+    # codes in a bytes object instead (gene = code / max code), 5-8 times smaller
+    quantization = None
 
-    def __init__(self, genes=None):
+    __slots__ = ('_genes', 'codes')
+
+    def __init__(self, genes=None, codes: bytes = None):
+        self._genes = None
+        self.codes = codes
+        if codes is not None:
+            return
         if genes is None:
+            if self.quantization is not None:
+                dtype = code_dtype(self.quantization)
+                self.codes = np.random.randint(0, np.iinfo(dtype).max + 1, self.gene_length).astype(dtype).tobytes()
+                return
             genes = np.random.uniform(size=self.gene_length)
         self.genes = genes
 
+    @property
+    def genes(self) -> np.ndarray:
+        if self.codes is None:
+            return self._genes
+        dtype = self.code_dtype
+        return np.frombuffer(self.codes, dtype=dtype) / np.iinfo(dtype).max
+
+    @genes.setter
+    def genes(self, genes):
+        if self.quantization is None:
+            self._genes = genes
+            self.codes = None
+        else:
+            self._genes = None
+            self.codes = encode(genes, code_dtype(self.quantization)).tobytes()
+
+    @property
+    def code_dtype(self) -> np.dtype:
+        return np.dtype(f'<u{len(self.codes) // self.gene_length}')
+
+    def quantized(self, dtype: np.dtype) -> np.ndarray:
+        """:return: the genes as codes of dtype"""
+        if self.codes is not None and self.code_dtype == dtype:
+            return np.frombuffer(self.codes, dtype=dtype)
+        return encode(self.genes, dtype)
+
+    def __getstate__(self):
+        # quantized genomes are pickled as their codes
+        if self.codes is not None:
+            return {'codes': self.codes}
+        return {'genes': self._genes}
+
+    def __setstate__(self, state):
+        self._genes = state.get('genes')
+        self.codes = state.get('codes')
+
     def copy(self):
+        if self.codes is not None:
+            # bytes are immutable, the copy can share them
+            return self.__class__(codes=self.codes)
         genes_copy = self.genes.copy()
-        return DNA(genes_copy)
+        return self.__class__(genes_copy)
 
     # II. SELECTION
     # in our case two creatures will reproduce with certain probability
@@ -45,16 +116,26 @@ class DNA:
     # single point crossover
     def crossover(self, partner):
         midpoint = np.random.randint(self.gene_length)
+        if self.codes is not None and partner.codes is not None and len(self.codes) == len(partner.codes):
+            width = len(self.codes) // self.gene_length
+            return self.__class__(codes=self.codes[midpoint * width:] + partner.codes[:midpoint * width])
         return self.__class__(np.concatenate((self.genes[midpoint:], partner.genes[:midpoint])))
 
     # 2. mutation
 
     def mutation(self):
+        if self.codes is not None:
+            codes = np.frombuffer(self.codes, dtype=self.code_dtype).copy()
+            mutate = np.random.uniform(size=len(codes)) < self.mutation_rate
+            codes[mutate] = np.random.randint(0, np.iinfo(codes.dtype).max + 1, int(mutate.sum()))
+            self.codes = codes.tobytes()
+            return
         for i, _ in enumerate(self.genes):
             if np.random.uniform() < self.mutation_rate:
                 self.genes[i] = np.random.uniform()
 
 
 class BrainDNA(DNA):
+    __slots__ = ()
     # gene_length = 52
     gene_length = 32
@@ -0,0 +1,192 @@
+import os
+import struct
+import logging
+import numpy as np
+from dna import BrainDNA, DNA, code_dtype
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'EVOGEN01'
+# magic, gene length, brain gene length, bytes per gene code (0 for float64 genes);
+# padded so the records stay aligned
+HEADER = struct.Struct('<8sHHH')
+HEADER_SIZE = 64
+# bits of the 'missing' field of quantized records
+NO_DNA = 1
+NO_BRAIN = 2
+
+
+def record_dtype(gene_length: int = DNA.gene_length, brain_gene_length: int = BrainDNA.gene_length,
+                 code_width: int = 0) -> np.dtype:
+    fields = [('id', '<u4'), ('parents', '<u4', (2,)), ('food_consumed', '<u4'), ('birth_tick', '<i8'),
+              ('death_tick', '<i8')]
+    if not code_width:
+        return np.dtype(fields + [('genes', '<f8', (gene_length,)), ('brain_genes', '<f8', (brain_gene_length,))])
+    # integer codes have no NaN, missing genes are flagged instead
+    return np.dtype(fields + [('missing', 'u1'), ('genes', f'<u{code_width}', (gene_length,)),
+                              ('brain_genes', f'<u{code_width}', (brain_gene_length,))])
+
+
+class Genealogy:
+    """
+    Append-only store with one fixed-size record per birth, kept in a growable
+    memory-mapped file so long runs use constant RAM
+
+    parent id 0 means no parent, death tick -1 means the creature is still alive
+    and genes of creatures without DNA / brain are NaN
+
+    When DNA.quantization is set as the file is created, genes are stored as their
+    integer codes, use genes() to read them as floats
+    """
+    initial_capacity = 1 << 14
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        if os.path.exists(filename) and os.path.getsize(filename) >= HEADER_SIZE:
+            with open(filename, mode='rb') as file_handle:
+                # files written before quantization have zero padding where the code width is
+                magic, gene_length, brain_gene_length, code_width = HEADER.unpack(file_handle.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{filename} is not a genealogy file")
+        else:
+            gene_length, brain_gene_length = DNA.gene_length, BrainDNA.gene_length
+            code_width = 0 if DNA.quantization is None else code_dtype(DNA.quantization).itemsize
+            with open(filename, mode='wb') as file_handle:
+                file_handle.write(HEADER.pack(MAGIC, gene_length, brain_gene_length, code_width)
+                                  .ljust(HEADER_SIZE, b'\0'))
+        self.code_width = code_width
+        self.dtype = record_dtype(gene_length, brain_gene_length, code_width)
+
+        capacity = (os.path.getsize(filename) - HEADER_SIZE) // self.dtype.itemsize
+        self.records = None
+        self._map(max(capacity, self.initial_capacity))
+        # rows are filled front to back and ids are never 0, so the first empty row ends the data
+        self.count = int(np.searchsorted(self.records['id'][:capacity] == 0, True))
+        if self.count:
+            # a new process starts counting ids at 1 again, appended births must not reuse logged ids
+            from objects import creature_id_generator
+            creature_id_generator.skip_past(self.data['id'].max())
+
+        # row of every creature that is still alive; bounded by the population, not by the births
+        self._alive = {}
+        self._sorted = None
+
+    def _map(self, capacity: int):
+        if self.records is not None:
+            self.records.flush()
+            self.records = None
+        size = HEADER_SIZE + capacity * self.dtype.itemsize
+        if os.path.getsize(self.filename) < size:
+            with open(self.filename, mode='r+b') as file_handle:
+                file_handle.truncate(size)
+        self.records = np.memmap(self.filename, dtype=self.dtype, mode='r+', offset=HEADER_SIZE, shape=(capacity,))
+
+    @property
+    def data(self) -> np.memmap:
+        """view of all recorded births"""
+        return self.records[:self.count]
+
+    def start(self, world):
+        # creatures already in the store (e.g. a reloaded world) are only marked alive again
+        ids = np.array([creature.id for creature in world.creatures], dtype='<u4')
+        rows = self.find(ids)
+        for creature, row in zip(world.creatures, rows):
+            if row < 0:
+                self.birth(creature, world.ticks)
+            else:
+                self._alive[creature.id] = int(row)
+
+    def birth(self, creature, tick: int):
+        if self.count == len(self.records):
+            self._map(2 * len(self.records))
+        record = self.records[self.count]
+        record['id'] = creature.id
+        parents = tuple(creature.parent_ids) + (0, 0)
+        record['parents'] = parents[:2]
+        record['birth_tick'] = tick
+        record['death_tick'] = -1
+        record['food_consumed'] = 0
+        dna = getattr(creature, 'dna', None)
+        brain = getattr(creature, 'brain', None)
+        if self.code_width:
+            dtype = self.dtype['genes'].base
+            record['missing'] = (NO_DNA if dna is None else 0) | (NO_BRAIN if brain is None else 0)
+            record['genes'] = 0 if dna is None else dna.quantized(dtype)
+            record['brain_genes'] = 0 if brain is None else brain.dna.quantized(dtype)
+        else:
+            record['genes'] = np.nan if dna is None else dna.genes
+            record['brain_genes'] = np.nan if brain is None else brain.dna.genes
+        self._alive[creature.id] = self.count
+        self.count += 1
+
+    def death(self, creature, tick: int):
+        row = self._alive.pop(creature.id, None)
+        if row is None:
+            return
+        self.records['death_tick'][row] = tick
+        self.records['food_consumed'][row] = creature.food_consumed
+
+    def flush(self):
+        self.records.flush()
+
+    def close(self):
+        self.flush()
+        self.records = None
+        with open(self.filename, mode='r+b') as file_handle:
+            file_handle.truncate(HEADER_SIZE + self.count * self.dtype.itemsize)
+
+    # queries
+
+    def find(self, ids) -> np.ndarray:
+        """:return: row of every id, -1 where the id isn't recorded"""
+        ids = np.asarray(ids, dtype='<u4')
+        if self.count == 0:
+            return np.full(len(ids), -1)
+        if self._sorted is None or self._sorted[0] != self.count:
+            order = np.argsort(self.data['id'], kind='stable')
+            self._sorted = (self.count, order, self.data['id'][order])
+        _, order, sorted_ids = self._sorted
+        positions = np.minimum(np.searchsorted(sorted_ids, ids), self.count - 1)
+        return np.where(sorted_ids[positions] == ids, order[positions], -1)
+
+    def ancestry(self, creature_id: int) -> np.ndarray:
+        """:return: records of all recorded ancestors of creature_id, closest generation first"""
+        rows = []
+        visited = np.zeros(self.count, dtype=bool)
+        frontier = self.find([creature_id])
+        frontier = frontier[frontier >= 0]
+        while len(frontier):
+            parents = self.data['parents'][frontier].ravel()
+            frontier = self.find(np.unique(parents[parents != 0]))
+            frontier = frontier[frontier >= 0]
+            frontier = frontier[~visited[frontier]]
+            visited[frontier] = True
+            rows.append(frontier)
+        if not rows:
+            return self.data[:0]
+        return self.data[np.concatenate(rows)]
+
+    def genes(self, brain: bool = False) -> np.ndarray:
+        """:return: genes (or brain genes) of all recorded births in [0, 1], NaN where missing"""
+        genes = self.data['brain_genes' if brain else 'genes']
+        if not self.code_width:
+            return genes
+        decoded = genes / np.iinfo(genes.dtype).max
+        decoded[(self.data['missing'] & (NO_BRAIN if brain else NO_DNA)) != 0] = np.nan
+        return decoded
+
+    def gene_drift(self, bin_ticks: int, brain: bool = False):
+        """
+        :return: (bin start ticks, mean genes of the creatures born in each bin),
+                 bins without births are NaN
+        """
+        genes = self.genes(brain)
+        bins = self.data['birth_tick'] // bin_ticks
+        n_bins = int(bins.max()) + 1 if len(bins) else 0
+        valid = ~np.isnan(genes).any(axis=1)
+        counts = np.bincount(bins[valid], minlength=n_bins)
+        sums = np.stack([np.bincount(bins[valid], weights=genes[valid, i], minlength=n_bins)
+                         for i in range(genes.shape[1])], axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums / counts[:, None]
+        return np.arange(n_bins) * bin_ticks, means
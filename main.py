@@ -1,17 +1,38 @@
 import pygame
 import random
 import sys
+import numpy as np
 import objects as obj
 from dna import BrainDNA, DNA
 from brain import Brain
 import logging
 import atexit
 import pickle
+import replay
+import genealogy
+import capture
+import observer
+import memwatch
+from diversity import Diversity
 
 # logging.basicConfig(level=logging.DEBUG)
 add_file_handler = False
 add_stdout_handler = True
 dump_filename = "world.dump"
+# set to a file name (e.g. "world.rec") to record the run for replay.py
+record_filename = None
+# set to a file name (e.g. "world.gen") to log every birth for genealogy queries
+genealogy_filename = None
+# set to a directory (e.g. "frames") to save every 10th frame as png for a timelapse
+capture_dir = None
+# set to a port (e.g. 8765) to stream the world to `python observer.py <host> <port>` clients
+observer_port = None
+# set to True to log memory use per subsystem and allocation growth every minute
+watch_memory = False
+# set to a resolution (e.g. 32) to look brain decisions up in tables compiled at birth, see `python brain.py`
+Brain.lookup_resolution = None
+# set to np.uint8 or np.uint16 to keep genes as compact integer codes in memory, dumps and logs
+DNA.quantization = None
 
 handlers = []
 if add_stdout_handler:
@@ -32,24 +53,21 @@ else:
     brain = Brain()
     brain.train(1500)
 
-    creatures = []
     pop_size = 50
 
-    for i in range(pop_size):
-        color = pygame.Color(random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
-        x = random.randint(0, 1024)
-        y = random.randint(0, 768)
-        # color red, color green, color blue, speed, size, reproduction preference
-        gene = [color.r / 255, color.g / 255, color.b / 255, random.uniform(0, 1), random.uniform(0, 1),
-                random.uniform(0, 1), random.uniform(0, 1)]
-        print(f"gene: {gene} generated")
-        creatures.append(obj.BrainCreature(x=x, y=y, dna=DNA(gene), brain_dna=brain.dna,
-                                           name='BrainCreature_' + str(obj.creature_id_generator.get_next_id())))
+    positions = np.column_stack((np.random.randint(0, 1025, pop_size), np.random.randint(0, 769, pop_size)))
+    # color red, color green, color blue, speed, size, reproduction preference, vision
+    genes = np.random.uniform(size=(pop_size, DNA.gene_length))
+    genes[:, :3] = np.random.randint(0, 256, (pop_size, 3)) / 255
+    for gene in genes:
+        print(f"gene: {gene.tolist()} generated")
 
     food = [obj.Food(random.uniform(0, 1000), random.uniform(0, 700)) for i in range(100)]
 
-    world = obj.World(1024, 768, creatures=creatures, edibles=food, creature_spawn_interval=1000, food_spawn_interval=1000,
-                  random_spawning=False, max_creatures=100)
+    world = obj.World(1024, 768, edibles=food, creature_spawn_interval=1000, food_spawn_interval=1000,
+                  random_spawning=False, max_creatures=100, diversity=Diversity())
+    # every creature starts with the trained brain
+    world.spawn_many(positions, genes, brain.dna)
 
 
 def dump_the_world_pickle(world_to_dump):
@@ -60,9 +78,35 @@ def dump_the_world_pickle(world_to_dump):
 
 atexit.register(dump_the_world_pickle, world)
 
+if record_filename:
+    recorder = replay.Recorder(record_filename)
+    world.set_recorder(recorder)
+    atexit.register(recorder.close)
+
+if genealogy_filename:
+    births = genealogy.Genealogy(genealogy_filename)
+    world.set_genealogy(births)
+    atexit.register(births.close)
+
+if capture_dir:
+    frame_capture = capture.FrameCapture(capture_dir, every=10)
+    world.set_capture(frame_capture)
+    atexit.register(frame_capture.close)
+
+if observer_port:
+    server = observer.ObserverServer(host='0.0.0.0', port=observer_port)
+    world.set_observer(server)
+    atexit.register(server.close)
+
+if watch_memory:
+    memory_watch = memwatch.MemoryWatch(every=3600)
+    world.set_memory_watch(memory_watch)
+    atexit.register(memory_watch.stop)
+
 while True:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
+        world.camera.handle_event(event)
 
     world.tick()
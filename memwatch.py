@@ -0,0 +1,128 @@
+import os
+import time
+import logging
+import tracemalloc
+import auxiliary
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes() -> int:
+    """resident set size of this process, 0 where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as file_handle:
+            return int(file_handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def subsystem_bytes(world) -> dict:
+    """
+    :return: bytes held by each part of the world; objects shared between
+             parts are counted in the first one they appear in
+    """
+    import objects
+    seen = set()
+    brains = [creature.brain for creature in world.creatures if hasattr(creature, 'brain')]
+    genomes = [creature.dna for creature in world.creatures if hasattr(creature, 'dna')]
+    genomes += [brain.dna for brain in brains]
+    report = {
+        'genomes': sum(auxiliary.deep_getsizeof(dna, seen) for dna in genomes),
+        'brains': sum(auxiliary.deep_getsizeof(brain, seen) for brain in brains),
+        'creatures': auxiliary.deep_getsizeof(world.creatures, seen),
+        'food': auxiliary.deep_getsizeof(world.edibles, seen),
+        'render': (world.screen.get_bytesize() * world.screen.get_width() * world.screen.get_height() +
+                   auxiliary.deep_getsizeof(objects._fonts, seen)),
+    }
+    if world.capture is not None:
+        report['capture queue'] = sum(frame.nbytes for _, frame in list(world.capture.frames.queue) if frame is not None)
+    if world.recorder is not None:
+        report['recorder'] = auxiliary.deep_getsizeof(world.recorder, seen)
+    return report
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class MemoryWatch:
+    """
+    Logs bytes per subsystem and tracemalloc allocation diffs every `every` ticks,
+    and a warning with the top growing allocation sites when the RSS grew by more
+    than `growth_threshold` bytes since the last warning (or since start)
+
+    tracemalloc slows allocation down noticeably, pass trace=False to only report sizes
+    """
+    def __init__(self, every: int = 3600, growth_threshold: int = 64 * 1024 ** 2, trace: bool = True,
+                 frames: int = 1, top: int = 10):
+        self.every = every
+        self.growth_threshold = growth_threshold
+        self.trace = trace
+        self.frames = frames
+        self.top = top
+        self.baseline_rss = 0
+        self.last_report = {}
+        self._first_snapshot = None
+        self._last_snapshot = None
+
+    def start(self, world):
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.baseline_rss = rss_bytes()
+        self.report(world)
+
+    def tick(self, world):
+        if world.ticks % self.every == 0:
+            self.report(world)
+
+    def report(self, world) -> dict:
+        started = time.time()
+        report = subsystem_bytes(world)
+        rss = rss_bytes()
+        logger.info(f"memory at tick {world.ticks}: rss {format_bytes(rss)}, " +
+                    ", ".join(f"{name} {format_bytes(size)}" for name, size in report.items()) +
+                    f", {len(world.creatures)} creatures, {len(world.edibles)} food")
+        for name, size in report.items():
+            previous = self.last_report.get(name)
+            if previous is not None and size > previous:
+                logger.info(f"memory: {name} grew by {format_bytes(size - previous)}")
+        self.last_report = report
+
+        if self.trace and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            if self._last_snapshot is not None:
+                self._log_diff(snapshot, self._last_snapshot, "since last report")
+            if self._first_snapshot is None:
+                self._first_snapshot = snapshot
+            self._last_snapshot = snapshot
+
+        if rss and self.baseline_rss and rss - self.baseline_rss > self.growth_threshold:
+            logger.warning(f"memory: rss grew by {format_bytes(rss - self.baseline_rss)} "
+                           f"to {format_bytes(rss)} (threshold {format_bytes(self.growth_threshold)})")
+            if self._first_snapshot is not None:
+                self._log_diff(self._last_snapshot, self._first_snapshot, "since start", logging.WARNING)
+            self.baseline_rss = rss
+        logger.debug(f"memory report took {time.time() - started:.3f}s")
+        return report
+
+    def _log_diff(self, snapshot, previous, label: str, level: int = logging.INFO):
+        stats = snapshot.compare_to(previous, 'lineno')
+        growing = [stat for stat in stats if stat.size_diff > 0][:self.top]
+        if not growing:
+            return
+        logger.log(level, f"memory: top allocation growth {label}:")
+        for stat in growing:
+            frame = stat.traceback[0]
+            logger.log(level, f"  {frame.filename}:{frame.lineno}: +{format_bytes(stat.size_diff)} "
+                              f"({stat.count_diff:+d} blocks), {format_bytes(stat.size)} total")
+
+    def stop(self):
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
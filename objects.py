@@ -2,14 +2,24 @@ import pygame
 import random
 import auxiliary
 from brain import Brain
-from dna import BrainDNA, DNA
+from dna import BrainDNA, DNA, gene_matrix
 from math import cos, pi, sin, atan2, fmod
 import logging
 import numpy as np
 import time
+from camera import Camera
 
 logger = logging.getLogger(__name__)
 
+_fonts = {}
+
+
+def get_font(size: int) -> pygame.font.Font:
+    # loading a font is slow, so every size is only loaded once
+    if size not in _fonts:
+        _fonts[size] = pygame.font.Font('freesansbold.ttf', size)
+    return _fonts[size]
+
 
 class CreatureIdGenerator:
     def __init__(self):
@@ -19,85 +29,253 @@ class CreatureIdGenerator:
         self.creature_id_inc_counter += 1
         return self.creature_id_inc_counter
 
+    def skip_past(self, used_id: int):
+        """makes sure ids that are already in use (in a loaded world or log) aren't handed out again"""
+        self.creature_id_inc_counter = max(self.creature_id_inc_counter, int(used_id))
+
 
 # create singleton creature id generator
 creature_id_generator = CreatureIdGenerator()
 
 
+def dna_list(genes, dna_class, n: int) -> list:
+    """
+    :param genes: (n, gene_length) array, list of dna_class, a single gene row
+                  or dna_class shared by all n, or None for random genes
+    """
+    if genes is None:
+        genes = np.random.uniform(size=(n, dna_class.gene_length))
+    elif isinstance(genes, DNA):
+        return [genes] * n
+    elif len(genes) and isinstance(genes[0], DNA):
+        return list(genes[:n])
+    genes = np.array(genes, dtype=float)
+    if genes.ndim == 1:
+        return [dna_class(genes)] * n
+    # copies of the rows, views would keep the whole array alive as long as one dna lives
+    return [dna_class(row.copy()) for row in genes[:n]]
+
+
 class World:
     def __init__(self, width: int = 640, height: int = 480, background: tuple = (0, 0, 0),
-                 creatures: list = [], edibles: list = [], food_spawn_interval: int = 1000,
-                 creature_spawn_interval: int = 10000, random_spawning: bool = True, max_creatures: int = 100):
+                 creatures: list = None, edibles: list = None, food_spawn_interval: int = 1000,
+                 creature_spawn_interval: int = 10000, random_spawning: bool = True, max_creatures: int = 100,
+                 recorder=None, genealogy=None, view_width: int = None, view_height: int = None,
+                 headless: bool = False, capture=None, observer=None, diversity=None, memory_watch=None):
         pygame.init()
         self.size = self.width, self.height = width, height
+        self.bounds = pygame.Rect(0, 0, width, height)
+        # the window only shows part of the world when it is smaller than the world
+        self.view_size = (view_width or width, view_height or height)
+        self.camera = Camera(*self.view_size)
         self.background = background
-        self.screen = pygame.display.set_mode(self.size)
+        # headless worlds draw to an offscreen surface and never open a window
+        self.headless = headless
+        self.screen = self._create_screen()
         self.clock = pygame.time.Clock()
         self.random_spawning = random_spawning
         self.max_creatures = max_creatures
 
         self.food_spawn_counter = 0
         self.food_spawn_interval = food_spawn_interval
-        self.edibles = edibles
+        # a list default would be shared by every world created without one
+        self.edibles = edibles if edibles is not None else []
 
         self.creature_spawn_counter = 0
         self.creature_spawn_interval = creature_spawn_interval
-        self.creatures = creatures
-
-        self.creature_total = len(creatures)
+        self.creatures = creatures if creatures is not None else []
+
+        self.creature_total = len(self.creatures)
+        self.ticks = 0
+
+        self.recorder = None
+        if recorder is not None:
+            self.set_recorder(recorder)
+        self.genealogy = None
+        if genealogy is not None:
+            self.set_genealogy(genealogy)
+        self.capture = capture
+        self.observer = None
+        if observer is not None:
+            self.set_observer(observer)
+        self.diversity = None
+        if diversity is not None:
+            self.set_diversity(diversity)
+        self.memory_watch = None
+        if memory_watch is not None:
+            self.set_memory_watch(memory_watch)
 
     def __getstate__(self):
         state = self.__dict__.copy()
         # Remove the unpicklable entries.
         del state['screen']
         del state['clock']
+        del state['recorder']
+        del state['genealogy']
+        del state['capture']
+        del state['observer']
+        del state['memory_watch']
         return state
 
     def __setstate__(self, state):
+        state.setdefault('ticks', 0)
+        state.setdefault('bounds', pygame.Rect(0, 0, *state['size']))
+        state.setdefault('view_size', state['size'])
+        state.setdefault('camera', Camera(*state['view_size']))
+        state.setdefault('headless', False)
+        state.setdefault('diversity', None)
         self.__dict__.update(state)
+        self.recorder = None
+        self.genealogy = None
+        self.capture = None
+        self.observer = None
+        self.memory_watch = None
         pygame.init()
-        self.screen = pygame.display.set_mode(self.size)
+        self.screen = self._create_screen()
         self.clock = pygame.time.Clock()
 
+    def _create_screen(self) -> pygame.Surface:
+        if self.headless:
+            return pygame.Surface(self.view_size)
+        return pygame.display.set_mode(self.view_size)
+
+    def set_recorder(self, recorder):
+        """starts recording the world from its current state (see replay.Recorder)"""
+        self.recorder = recorder
+        recorder.start(self)
+
+    def set_genealogy(self, genealogy):
+        """logs every birth from now on to genealogy (see genealogy.Genealogy)"""
+        self.genealogy = genealogy
+        genealogy.start(self)
+
+    def set_capture(self, capture):
+        """grabs a frame every capture.every ticks (see capture.FrameCapture)"""
+        self.capture = capture
+
+    def set_observer(self, observer):
+        """starts streaming the world to remote observers (see observer.ObserverServer)"""
+        self.observer = observer
+        observer.start()
+        observer.tick(self)
+
+    def set_diversity(self, diversity):
+        """tracks gene statistics and species of the population (see diversity.Diversity)"""
+        self.diversity = diversity
+        diversity.start(self)
+
+    def set_memory_watch(self, memory_watch):
+        """logs memory use per subsystem and allocation growth (see memwatch.MemoryWatch)"""
+        self.memory_watch = memory_watch
+        memory_watch.start(self)
+
     def add_creature(self, creature):
         # sanity check so the computer doesn't crash with bad params
         if len(self.creatures) > self.max_creatures:
             return
         self.creatures.append(creature)  # comment back
         self.creature_total += 1
+        if self.recorder is not None:
+            self.recorder.birth(creature)
+        if self.genealogy is not None:
+            self.genealogy.birth(creature, self.ticks)
+        if self.diversity is not None:
+            self.diversity.birth(creature)
+
+    def spawn_many(self, positions, genes, brain_genes=None, directions=None, health=None,
+                   parent_ids=None) -> list:
+        """
+        builds BrainCreatures for all positions in one vectorized pass and adds them
+        :param positions: (n, 2) array of x, y
+        :param genes: DNA genes for every creature, see dna_list
+        :param brain_genes: BrainDNA genes for every creature, see dna_list
+        :param directions: n directions, 0 by default
+        :param health: n health values, Creature.base_health by default
+        :param parent_ids: n tuples of parent ids, none by default
+        :return: the creatures added, fewer than positions once max_creatures is reached
+        """
+        # add_creature refuses creatures once there are more than max_creatures
+        room = max(self.max_creatures + 1 - len(self.creatures), 0)
+        positions = np.asarray(positions, dtype=float)[:room]
+        n = len(positions)
+        creatures = BrainCreature.many(positions, dna_list(genes, DNA, n), dna_list(brain_genes, BrainDNA, n),
+                                       directions=None if directions is None else directions[:n],
+                                       health=None if health is None else health[:n],
+                                       parent_ids=None if parent_ids is None else parent_ids[:n])
+        for creature in creatures:
+            self.add_creature(creature)
+        return creatures
 
     def add_edible(self, food):
         self.edibles.append(food)
+        if self.recorder is not None:
+            self.recorder.food_spawn(food)
 
     def generate_random_creature(self):
         return BrainCreature(x=random.uniform(0, self.width), y=random.uniform(0, self.height), dna=DNA(),
-                             brain_dna=BrainDNA(), name='Creature ' + str(creature_id_generator.get_next_id()))
+                             brain_dna=BrainDNA())
 
     def remove_creature(self, creature):
         creature.log("died")
         self.creatures.remove(creature)
+        if self.recorder is not None:
+            self.recorder.death(creature)
+        if self.genealogy is not None:
+            self.genealogy.death(creature, self.ticks)
+        if self.diversity is not None:
+            self.diversity.death(creature)
         # self.add_edible(Food(creature.x, creature.y, value=creature.size * 2, color=creature.color))
 
     def remove_edible(self, edible):
         self.edibles.remove(edible)
+        if self.recorder is not None:
+            self.recorder.food_eaten(edible)
 
     def tick(self):
         dt = self.clock.tick(60)
+        self.step(dt, grab_frame=False)
+
+        self.draw()
+        # the frame that was just drawn anyway is the capture
+        if self.capture is not None and self.capture.due(self.ticks):
+            self.capture.grab(self.screen)
+        if not self.headless:
+            pygame.display.flip()
+
+    def step(self, dt: float, grab_frame: bool = True):
+        """
+        advances the simulation by dt milliseconds without drawing, except for the
+        frames of a capture when grab_frame is set (tick grabs them after its own draw)
+        """
+        if self.recorder is not None:
+            self.recorder.tick(self, dt)
+        self.ticks += 1
 
         self.update_creatures(dt)
         self.update_edibles(dt)
 
-        self.draw()
-        pygame.display.flip()
+        if grab_frame and self.capture is not None and self.capture.due(self.ticks):
+            self.draw()
+            self.capture.grab(self.screen)
+        if self.observer is not None:
+            self.observer.tick(self)
+        if self.diversity is not None:
+            self.diversity.tick(self)
+        if self.memory_watch is not None:
+            self.memory_watch.tick(self)
 
     def draw(self):
         self.screen.fill(self.background)
+        # only objects inside the viewport are drawn
+        visible = self.camera.view_rect
         for creature in self.creatures:
-            creature.draw(self.screen)
+            if visible.colliderect(creature.vision_rect):
+                creature.draw(self.screen, self.camera)
         for food in self.edibles:
-            food.draw(self.screen)
+            if visible.colliderect(food.rect):
+                food.draw(self.screen, self.camera)
 
-        font = pygame.font.Font('freesansbold.ttf', 14)
+        font = get_font(14)
         text = font.render(f"# of creatures: {len(self.creatures)}", True, (255, 255, 255), (0, 0, 0))
         text_rect = text.get_rect()
         text_rect.center = (100, 50)
@@ -111,6 +289,14 @@ class World:
         self.screen.blit(al_text, al_text_rect)
         current_text_bottom += al_text.get_size()[1]
 
+        if self.diversity is not None:
+            div_text = font.render(f"gene diversity: {round(self.diversity.gene_diversity, 3)}, "
+                                   f"species: {len(self.diversity.species)}", True, (255, 255, 255), (0, 0, 0))
+            div_text_rect = div_text.get_rect()
+            div_text_rect.center = (100, current_text_bottom)
+            self.screen.blit(div_text, div_text_rect)
+            current_text_bottom += div_text.get_size()[1]
+
         # max_text = font.render(f"max lifespan: {self.get_max_lifespan()}", True, (255, 255, 255), (0, 0, 0))
         # max_text_rect = max_text.get_rect()
         # max_text_rect.center = (100, current_text_bottom)
@@ -138,7 +324,10 @@ class World:
             elite_children.append(elite[parents[0]][0].sexual_multiply(elite[parents[1]][0]))
         """
         # asexual
-        elite_children = [parent[0].asexual_multiply() for parent in elite]
+        parents = [parent[0] for parent in elite]
+        if all(type(parent) is BrainCreature for parent in parents):
+            return BrainCreature.asexual_multiply_many(parents)
+        elite_children = [parent.asexual_multiply() for parent in parents]
         return elite_children
 
     def update_creatures(self, dt):
@@ -193,27 +382,94 @@ class World:
 
 
 class Object:
-    def __init__(self, x: float, y: float, direction: float = 0.0, name: str = 'object'):
-        self.x = x
-        self.y = y
+    # position lives in the subclasses (SquareObject keeps it in its rect only)
+    __slots__ = ('direction', '_id', '_name')
+
+    def __init__(self, direction: float = 0.0, name: str = None):
         self.direction = direction
-        self.name = name
+        # id and name are only generated when first needed
+        self._id = None
+        self._name = name
+
+    @property
+    def id(self) -> int:
+        if self._id is None:
+            self._id = creature_id_generator.get_next_id()
+        return self._id
+
+    @property
+    def name(self) -> str:
+        if self._name is None:
+            return f"{type(self).__name__}_{self.id}"
+        return self._name
+
+    @name.setter
+    def name(self, value: str):
+        self._name = value
 
     def log(self, info: str):
         # pass
-        logger.debug(self.name + ": " + info)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self.name + ": " + info)
+
+    def __getstate__(self):
+        state = {}
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                if hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        # worlds pickled before the move to __slots__ kept x, y and name in __dict__
+        state.pop('x', None)
+        state.pop('y', None)
+        state.pop('dx', None)
+        state.pop('dy', None)
+        state.pop('detection_chance', None)
+        if 'name' in state:
+            state['_name'] = state.pop('name')
+        state.setdefault('_id', None)
+        for key, value in state.items():
+            setattr(self, key, value)
+        # the id counter starts over in a new process, new objects must not get a restored id
+        if self._id is not None:
+            creature_id_generator.skip_past(self._id)
 
 
 class SquareObject(Object):
+    __slots__ = ('rect', 'color', 'size')
+
     def __init__(self, x: float, y: float, size: float, color: pygame.Color, direction: float = 0.0,
-                 name: str = 'object'):
-        super().__init__(x, y, direction, name=name)
+                 name: str = None):
+        super().__init__(direction, name=name)
         self.rect = pygame.Rect(x + size // 2, y + size // 2, size, size)
         self.color = color
         self.size = size
 
-    def draw(self, surface: pygame.Surface):
-        pygame.draw.rect(surface, self.color, self.rect)
+    # the rect is the single source of truth for the position
+    @property
+    def x(self) -> int:
+        return self.rect.centerx
+
+    @x.setter
+    def x(self, value: float):
+        self.rect.centerx = value
+
+    @property
+    def y(self) -> int:
+        return self.rect.centery
+
+    @y.setter
+    def y(self, value: float):
+        self.rect.centery = value
+
+    def draw(self, surface: pygame.Surface, camera: Camera = None):
+        if camera is None:
+            pygame.draw.rect(surface, self.color, self.rect)
+        else:
+            pygame.draw.rect(surface, self.color, camera.rect_to_screen(self.rect))
 
 
 class Creature(SquareObject):
@@ -224,10 +480,14 @@ class Creature(SquareObject):
     death_rate = 0.01  # possibility of random death
     direction_change_delay = 500
     min_multiply_health = 1000
+    detection_chance = 1000
+
+    __slots__ = ('speed', 'health', 'multiply_chance', 'multiply_cd', 'direction_change_cd', 'vision_radius',
+                 'vision_rect', 'x_acc', 'y_acc', 'lifespan_start', 'food_consumed', 'parent_ids')
 
     def __init__(self, x: float, y: float, size: float, speed: float, color: pygame.Color,
-                 direction: float = 0.0, vision_radius: int = 100, name: str = 'object_x',
-                 multiply_chance=(0.25, 0.05), health: int = None):
+                 direction: float = 0.0, vision_radius: int = 100, name: str = None,
+                 multiply_chance=(0.25, 0.05), health: int = None, parent_ids: tuple = ()):
         super().__init__(x, y, size, color, direction, name=name)
 
         self.log("creature created")
@@ -246,28 +506,29 @@ class Creature(SquareObject):
         self.vision_radius = vision_radius
         self.log(f"vision radius: {self.vision_radius}")
         # self.vision_radius = 300
-        self.detection_chance = 1000
-        self.vision_rect = pygame.Rect(self.x + self.vision_radius, self.y + self.vision_radius,
-                                       self.vision_radius * 2, self.vision_radius * 2)
+        self.vision_rect = pygame.Rect(0, 0, self.vision_radius * 2, self.vision_radius * 2)
+        self.vision_rect.center = self.rect.center
 
         # auxiliary attributes
-        self.dx = 0.0
-        self.dy = 0.0
         self.x_acc = 0.0
         self.y_acc = 0.0
 
         self.lifespan_start = time.time()
 
         self.food_consumed = 0
+        self.parent_ids = parent_ids
 
     def __getstate__(self):
-        state = self.__dict__.copy()
-        # Remove the unpicklable entries.
+        state = super().__getstate__()
+        # store the age instead of the wall clock start time
         state['lifespan_start'] = time.time() - float(state['lifespan_start'])
         return state
 
     def __setstate__(self, state):
-        self.__dict__.update(state)
+        state = dict(state)
+        # creatures pickled before parents were tracked
+        state.setdefault('parent_ids', ())
+        super().__setstate__(state)
         self.lifespan_start = time.time() - self.lifespan_start
 
     def can_change_direction(self):
@@ -281,23 +542,28 @@ class Creature(SquareObject):
     def get_lifespan(self):
         return time.time() - self.lifespan_start
 
-    def draw(self, surface: pygame.Surface):
-        super().draw(surface)
+    def draw(self, surface: pygame.Surface, camera: Camera = None):
+        super().draw(surface, camera)
         color = pygame.Color(255, 255, 255)
+        if camera is None:
+            camera = Camera(*surface.get_size())
 
-        pygame.draw.rect(surface, self.color, self.vision_rect, 1)
+        pygame.draw.rect(surface, self.color, camera.rect_to_screen(self.vision_rect), 1)
 
-        a = pygame.math.Vector2(self.x, self.y)
-        b = pygame.math.Vector2(self.x - self.size * cos(self.direction),
-                                self.y - self.size * sin(self.direction))
+        x, y = camera.to_screen(self.x, self.y)
+        a = pygame.math.Vector2(x, y)
+        b = pygame.math.Vector2(camera.to_screen(self.x - self.size * cos(self.direction),
+                                                 self.y - self.size * sin(self.direction)))
         pygame.draw.line(surface, color, a, b)
-        font = pygame.font.Font('freesansbold.ttf', 12)
+        if not camera.draw_labels:
+            return
+        font = get_font(12)
         if self.can_multiply():
             text = font.render("fertile", True, (0, 255, 0), (0, 0, 0))
         else:
             text = font.render(str(self.multiply_cd // 1000), True, (255, 0, 0), (0, 0, 0))
         text_rect = text.get_rect()
-        text_rect.center = (self.x, self.y)
+        text_rect.center = (x, y)
         surface.blit(text, text_rect)
 
         # print health
@@ -311,12 +577,12 @@ class Creature(SquareObject):
         b = 0
         health_text = font.render(f"h: {round(health_ratio * 100, 2)}%", True, (r, g, b), (0, 0, 0))
         health_text_rect = health_text.get_rect()
-        health_text_rect.center = (self.x, self.y + 15)
+        health_text_rect.center = (x, y + 15)
         surface.blit(health_text, health_text_rect)
 
         food_text = font.render(f"f: {self.food_consumed}", True, (255, 255, 255), (0, 0, 0))
         food_text_rect = food_text.get_rect()
-        food_text_rect.center = (self.x, self.y + 30)
+        food_text_rect.center = (x, y + 30)
         surface.blit(food_text, food_text_rect)
 
         # disposition output
@@ -399,8 +665,8 @@ class Creature(SquareObject):
         self.multiply_cd = self.multiply_delay
         size = random.uniform(self.size * 0.9, self.size * 1.1)
         return Creature(self.x, self.y, size, speed=random.uniform(self.speed * 0.9, self.speed * 1.1),
-                        color=self.color, direction=fmod(self.direction + pi, 2 * pi), name=self.name,
-                        multiply_chance=self.multiply_chance)
+                        color=self.color, direction=fmod(self.direction + pi, 2 * pi),
+                        multiply_chance=self.multiply_chance, parent_ids=(self.id,))
 
     def sexual_multiply(self, partner):
         return self.multiply()
@@ -423,8 +689,6 @@ class Creature(SquareObject):
 
     def update_rect(self, rect: pygame.Rect):
         self.rect = rect
-        self.x = rect.centerx
-        self.y = rect.centery
         self.vision_rect.center = rect.center
 
     def creature_interaction(self, world: World, dt):
@@ -455,10 +719,10 @@ class Creature(SquareObject):
 
     def get_velocity(self, dt):
 
-        self.dx = self.speed / 50 * cos(self.direction) * dt
-        self.dy = self.speed / 50 * sin(self.direction) * dt
-        vel_x = self.dx + self.x_acc
-        vel_y = self.dy + self.y_acc
+        dx = self.speed / 50 * cos(self.direction) * dt
+        dy = self.speed / 50 * sin(self.direction) * dt
+        vel_x = dx + self.x_acc
+        vel_y = dy + self.y_acc
         # self.log(f"velocity: x: {vel_x}, y: {vel_y}")
 
         self.x_acc = vel_x - int(vel_x)
@@ -480,14 +744,18 @@ class Creature(SquareObject):
                 else:
                     self.direction = atan2(target.x - self.x, target.y - self.y)
                 direction_changed = True
+                if world.recorder is not None:
+                    world.recorder.direction(self)
 
         vel_x, vel_y = self.get_velocity(dt)
         new_rect = self.rect.move(vel_x, vel_y)
 
-        bounds = world.screen.get_rect()
+        bounds = world.bounds
         if not bounds.contains(new_rect):
             if self.can_change_direction():
                 self.direction = fmod(self.direction + random.uniform(0, pi), (2 * pi))
+                if world.recorder is not None:
+                    world.recorder.bounce(self)
                 vel_x, vel_y = self.get_velocity(dt)
                 new_rect = self.rect.move(vel_x, vel_y)
                 direction_changed = True
@@ -529,15 +797,20 @@ class DnaCreature(Creature):
     min_vision_radius = 50.0
     max_vision_radius = 150.0
 
-    def __init__(self, x: float, y: float, dna=DNA(), direction: float = 0.0, name: str = 'object', health: int = None):
-        color = pygame.Color(int(dna.genes[0] * 255), int(dna.genes[1] * 255), int(dna.genes[2] * 255))
-        speed = auxiliary.map(dna.genes[3], 0, 1, self.min_speed, self.max_speed)
-        size = auxiliary.map(dna.genes[4], 0, 1, self.min_size, self.max_size)
-        multiply_chance = (auxiliary.map(dna.genes[5], 0, 1, self.min_s_multiply, self.max_s_multiply),
-                           auxiliary.map(dna.genes[5], 0, 1, self.max_a_multiply, self.min_a_multiply))
-        vision_radius = auxiliary.map(dna.genes[6], 0, 1, size, self.max_vision_radius)
+    __slots__ = ('dna',)
+
+    def __init__(self, x: float, y: float, dna=DNA(), direction: float = 0.0, name: str = None, health: int = None,
+                 parent_ids: tuple = ()):
+        # quantized genes are decoded on every access
+        genes = dna.genes
+        color = pygame.Color(int(genes[0] * 255), int(genes[1] * 255), int(genes[2] * 255))
+        speed = auxiliary.map(genes[3], 0, 1, self.min_speed, self.max_speed)
+        size = auxiliary.map(genes[4], 0, 1, self.min_size, self.max_size)
+        multiply_chance = (auxiliary.map(genes[5], 0, 1, self.min_s_multiply, self.max_s_multiply),
+                           auxiliary.map(genes[5], 0, 1, self.max_a_multiply, self.min_a_multiply))
+        vision_radius = auxiliary.map(genes[6], 0, 1, size, self.max_vision_radius)
         super().__init__(x, y, size, speed, color, direction, vision_radius, name=name, multiply_chance=multiply_chance,
-                         health=health)
+                         health=health, parent_ids=parent_ids)
         self.dna = dna
 
         # counter for food consumed
@@ -547,6 +820,57 @@ class DnaCreature(Creature):
 
         # neural network parameters
 
+    @classmethod
+    def many(cls, positions, dnas: list, directions=None, health=None, parent_ids=None) -> list:
+        """
+        builds a creature for every dna like the constructor does, with the
+        phenotype of all of them derived from their genes at once
+        """
+        n = len(dnas)
+        genes = gene_matrix(dnas, DNA.gene_length)
+        colors = (genes[:, :3] * 255).astype(int).tolist()
+        speeds = auxiliary.map(genes[:, 3], 0, 1, cls.min_speed, cls.max_speed).tolist()
+        sizes = auxiliary.map(genes[:, 4], 0, 1, cls.min_size, cls.max_size)
+        sexual_chances = auxiliary.map(genes[:, 5], 0, 1, cls.min_s_multiply, cls.max_s_multiply).tolist()
+        asexual_chances = auxiliary.map(genes[:, 5], 0, 1, cls.max_a_multiply, cls.min_a_multiply).tolist()
+        vision_radii = auxiliary.map(genes[:, 6], 0, 1, sizes, cls.max_vision_radius).tolist()
+        sizes = sizes.tolist()
+        positions = np.asarray(positions, dtype=float).reshape(n, 2).tolist()
+        directions = [0.0] * n if directions is None else list(directions)
+        health = [cls.base_health] * n if health is None else list(health)
+        parent_ids = [()] * n if parent_ids is None else list(parent_ids)
+        lifespan_start = time.time()
+
+        creatures = []
+        for i, dna in enumerate(dnas):
+            creature = cls.__new__(cls)
+            x, y = positions[i]
+            size = sizes[i]
+            vision_radius = vision_radii[i]
+            creature.direction = directions[i]
+            creature._id = None
+            creature._name = None
+            creature.rect = pygame.Rect(x + size // 2, y + size // 2, size, size)
+            creature.color = pygame.Color(*colors[i])
+            creature.size = size
+            creature.speed = speeds[i]
+            creature.health = health[i]
+            creature.multiply_chance = (sexual_chances[i], asexual_chances[i])
+            creature.multiply_cd = cls.multiply_delay
+            creature.direction_change_cd = cls.direction_change_delay
+            creature.vision_radius = vision_radius
+            creature.vision_rect = pygame.Rect(0, 0, vision_radius * 2, vision_radius * 2)
+            creature.vision_rect.center = creature.rect.center
+            creature.x_acc = 0.0
+            creature.y_acc = 0.0
+            creature.lifespan_start = lifespan_start
+            creature.food_consumed = 0
+            creature.parent_ids = parent_ids[i]
+            creature.dna = dna
+            creatures.append(creature)
+        logger.debug(f"{n} {cls.__name__}s created")
+        return creatures
+
     # reproduction comes with a cost
 
     def get_repro_dna(self, partner: 'DnaCreature' = None) -> DNA:
@@ -566,8 +890,8 @@ class DnaCreature(Creature):
         dna = self.get_repro_dna()
 
         self.log("produced child via asexual reproduction")
-        return DnaCreature(self.x, self.y, dna=dna, direction=fmod(self.direction + pi, (2 * pi)), name="DnaCreature_" + str(creature_id_generator.get_next_id()),
-                           health=child_health)
+        return DnaCreature(self.x, self.y, dna=dna, direction=fmod(self.direction + pi, (2 * pi)),
+                           health=child_health, parent_ids=(self.id,))
 
     def sexual_multiply(self, partner: 'DnaCreature') -> 'DnaCreature':
         self_donation = self.health * 0.25
@@ -581,16 +905,36 @@ class DnaCreature(Creature):
         self.log("produced child with %s via sexual reproduction" % partner.name)
 
         return DnaCreature(self.x, self.y, dna=child_dna, direction=fmod((self.direction + pi), (2 * pi)),
-                           name="DnaCreature_" + str(creature_id_generator.get_next_id()), health=self_donation + partner_donation)
+                           health=self_donation + partner_donation, parent_ids=(self.id, partner.id))
 
 
 class BrainCreature(DnaCreature):
+    __slots__ = ('brain',)
+
     def __init__(self, x: float, y: float, dna: DNA = DNA(), brain_dna: DNA = BrainDNA(), direction: float = 0.0,
-                 name: str = 'object', health: int = None):
-        super().__init__(x, y, dna, direction, name, health=health)
+                 name: str = None, health: int = None, parent_ids: tuple = ()):
+        super().__init__(x, y, dna, direction, name, health=health, parent_ids=parent_ids)
         # objective function
         self.brain = Brain(brain_dna)
 
+    @classmethod
+    def many(cls, positions, dnas: list, brain_dnas: list = None, directions=None, health=None,
+             parent_ids=None) -> list:
+        creatures = super().many(positions, dnas, directions=directions, health=health, parent_ids=parent_ids)
+        if brain_dnas is None:
+            brain_dnas = dna_list(None, BrainDNA, len(dnas))
+        for creature, brain in zip(creatures, Brain.many(brain_dnas)):
+            creature.brain = brain
+        return creatures
+
+    @classmethod
+    def asexual_multiply_many(cls, parents: list) -> list:
+        """asexual_multiply of every parent, with the children built together"""
+        offspring = [parent.asexual_offspring() for parent in parents]
+        return cls.many([(parent.x, parent.y) for parent in parents], [child[0] for child in offspring],
+                        [child[1] for child in offspring], directions=[child[2] for child in offspring],
+                        health=[child[3] for child in offspring], parent_ids=[(parent.id,) for parent in parents])
+
     def get_brain_repro_dna(self, partner: 'BrainCreature' = None) -> BrainDNA:
         if partner is None:
             dna = self.brain.dna.copy()
@@ -600,7 +944,8 @@ class BrainCreature(DnaCreature):
         dna.mutation()
         return dna
 
-    def asexual_multiply(self):
+    def asexual_offspring(self) -> tuple:
+        """pays for a child and returns its dna, brain dna, direction and health"""
         child_health = min(self.health * 0.5 + 1000, self.health)
         self.health -= child_health
         self.multiply_cd = self.multiply_delay
@@ -609,10 +954,12 @@ class BrainCreature(DnaCreature):
 
         dna = self.get_repro_dna()
         brain_dna = self.get_brain_repro_dna()
+        return dna, brain_dna, fmod(self.direction + pi, (2 * pi)), child_health
 
-        return BrainCreature(self.x, self.y, dna=dna, brain_dna=brain_dna,
-                             direction=fmod(self.direction + pi, (2 * pi)),
-                             name="BrainCreature_" + str(creature_id_generator.get_next_id()), health=child_health)
+    def asexual_multiply(self):
+        dna, brain_dna, direction, child_health = self.asexual_offspring()
+        return BrainCreature(self.x, self.y, dna=dna, brain_dna=brain_dna, direction=direction, health=child_health,
+                             parent_ids=(self.id,))
 
     def sexual_multiply(self, partner: 'DnaCreature') -> 'DnaCreature':
         self_donation = min(self.health * 0.25 + 500, self.health)
@@ -626,7 +973,7 @@ class BrainCreature(DnaCreature):
 
         return BrainCreature(self.x, self.y, dna=dna, brain_dna=brain_dna,
                              direction=fmod((self.direction + pi), (2 * pi)),
-                             name="BrainCreature_" + str(creature_id_generator.get_next_id()), health=self_donation + partner_donation)
+                             health=self_donation + partner_donation, parent_ids=(self.id, partner.id))
 
     def do_movement(self, world: World, dt: float):
         direction_changed = False
@@ -650,18 +997,25 @@ class BrainCreature(DnaCreature):
                     # else:
                     #     neuron_input[5] = -1 * target.size / self.size
 
-            direction = self.brain.get_direction(neuron_input)
+            if self.brain.table is not None:
+                direction = self.brain.table.direction(*neuron_input.tolist())
+            else:
+                direction = self.brain.get_direction(neuron_input).item()
             direction_changed = self.direction == direction
             self.direction = direction
+            if world.recorder is not None:
+                world.recorder.direction(self)
             # print('brain', neuron_input, direction)
 
         vel_x, vel_y = self.get_velocity(dt)
         new_rect = self.rect.move(vel_x, vel_y)
 
-        bounds = world.screen.get_rect()
+        bounds = world.bounds
         if not bounds.contains(new_rect):
             if self.can_change_direction():
                 self.direction = fmod((self.direction + random.uniform(0, pi)), (2 * pi))
+                if world.recorder is not None:
+                    world.recorder.bounce(self)
                 vel_x, vel_y = self.get_velocity(dt)
                 new_rect = self.rect.move(vel_x, vel_y)
                 direction_changed = True
@@ -674,6 +1028,8 @@ class BrainCreature(DnaCreature):
 
 
 class Food(SquareObject):
+    __slots__ = ('value',)
+
     def __init__(self, x: float, y: float, value: float = 2000, size: float = 3.0,
                  color: pygame.Color = pygame.Color(125, 125, 125)):
         super().__init__(x, y, size, color, 0, name='food')
@@ -0,0 +1,242 @@
+import asyncio
+import struct
+import sys
+import threading
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# wire format: every message is a little-endian u32 length followed by that many bytes:
+#   kind u8, tick u64, then
+#   FULL:  n creatures u32, n food u32, creature records, food records
+#   DELTA: n born u32, n died u32, n moved u32, n food added u32, n food removed u32,
+#          born creature records, died ids, moved records, added food records, removed food ids
+
+FULL = 0
+DELTA = 1
+
+CREATURE = np.dtype([('id', '<u4'), ('x', '<i4'), ('y', '<i4'), ('size', '<u2'), ('r', 'u1'), ('g', 'u1'),
+                     ('b', 'u1')])
+POSITION = np.dtype([('id', '<u4'), ('x', '<i4'), ('y', '<i4')])  # moved creatures and food
+ID = np.dtype('<u4')
+
+LENGTH = struct.Struct('<I')
+MESSAGE = struct.Struct('<BQ')
+FULL_COUNTS = struct.Struct('<II')
+DELTA_COUNTS = struct.Struct('<IIIII')
+
+
+class Snapshot:
+    """positions of everything in the world at one tick, sorted by id"""
+    __slots__ = ('tick', 'creatures', 'food')
+
+    def __init__(self, tick: int, creatures: np.ndarray, food: np.ndarray):
+        self.tick = tick
+        self.creatures = np.sort(creatures, order='id')
+        self.food = np.sort(food, order='id')
+
+    @classmethod
+    def of(cls, world) -> 'Snapshot':
+        creatures = np.array([(creature.id, creature.rect.centerx, creature.rect.centery, creature.rect.width,
+                               creature.color.r, creature.color.g, creature.color.b)
+                              for creature in world.creatures], dtype=CREATURE)
+        food = np.array([(food.id, food.rect.centerx, food.rect.centery) for food in world.edibles], dtype=POSITION)
+        return cls(world.ticks, creatures, food)
+
+
+def encode_full(snapshot: Snapshot) -> bytes:
+    body = (MESSAGE.pack(FULL, snapshot.tick) + FULL_COUNTS.pack(len(snapshot.creatures), len(snapshot.food)) +
+            snapshot.creatures.tobytes() + snapshot.food.tobytes())
+    return LENGTH.pack(len(body)) + body
+
+
+def encode_delta(old: Snapshot, new: Snapshot) -> bytes:
+    old_alive = np.isin(old.creatures['id'], new.creatures['id'], assume_unique=True)
+    new_known = np.isin(new.creatures['id'], old.creatures['id'], assume_unique=True)
+    born = new.creatures[~new_known]
+    died = old.creatures['id'][~old_alive]
+    # both are sorted by id, so the surviving creatures line up
+    before = old.creatures[old_alive]
+    after = new.creatures[new_known]
+    changed = (before['x'] != after['x']) | (before['y'] != after['y'])
+    moved = np.empty(int(changed.sum()), dtype=POSITION)
+    for field in POSITION.names:
+        moved[field] = after[field][changed]
+    food_added = new.food[~np.isin(new.food['id'], old.food['id'], assume_unique=True)]
+    food_removed = old.food['id'][~np.isin(old.food['id'], new.food['id'], assume_unique=True)]
+
+    body = (MESSAGE.pack(DELTA, new.tick) +
+            DELTA_COUNTS.pack(len(born), len(died), len(moved), len(food_added), len(food_removed)) +
+            born.tobytes() + died.astype(ID).tobytes() + moved.tobytes() + food_added.tobytes() +
+            food_removed.astype(ID).tobytes())
+    return LENGTH.pack(len(body)) + body
+
+
+class _Client:
+    __slots__ = ('writer', 'sent', 'wake')
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.sent = None
+        self.wake = asyncio.Event()
+
+
+class ObserverServer:
+    """
+    Streams the world to TCP clients from an asyncio loop in a background thread
+
+    The world only builds a Snapshot every `every` ticks and hands it over; it never
+    waits for the network. A new client gets a full snapshot, after that deltas
+    against the last snapshot it actually received. A client that can't keep up
+    just skips the snapshots published while it was still sending, so its next
+    delta covers several of them.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, every: int = 6):
+        self.host = host
+        self.port = port
+        self.every = every
+        self.latest = None
+        self.loop = None
+        self._clients = set()
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='observer-server', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._server = self.loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+        # port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"observer server listening on {self.host}:{self.port}")
+        self._ready.set()
+        self.loop.run_forever()
+
+    def tick(self, world):
+        if world.ticks % self.every == 0:
+            self.publish(Snapshot.of(world))
+
+    def publish(self, snapshot: Snapshot):
+        self.loop.call_soon_threadsafe(self._set_latest, snapshot)
+
+    def _set_latest(self, snapshot: Snapshot):
+        self.latest = snapshot
+        for client in self._clients:
+            client.wake.set()
+
+    async def _serve(self, reader, writer):
+        client = _Client(writer)
+        self._clients.add(client)
+        client.wake.set()
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                snapshot = self.latest
+                if snapshot is None or snapshot is client.sent:
+                    continue
+                if client.sent is None:
+                    writer.write(encode_full(snapshot))
+                else:
+                    writer.write(encode_delta(client.sent, snapshot))
+                client.sent = snapshot
+                # only this client waits here, publishing goes on
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+    def close(self):
+        if self.loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            for client in list(self._clients):
+                client.writer.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop = None
+
+
+def _take(data: bytes, offset: int, dtype: np.dtype, count: int):
+    array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+    return array, offset + count * dtype.itemsize
+
+
+class WorldMirror:
+    """client side copy of the world, rebuilt from the messages of an ObserverServer"""
+    def __init__(self):
+        self.tick = None
+        self.creatures = {}  # id -> CREATURE record
+        self.food = {}  # id -> (x, y)
+
+    def apply(self, message: bytes):
+        kind, self.tick = MESSAGE.unpack_from(message, 0)
+        offset = MESSAGE.size
+        if kind == FULL:
+            n_creatures, n_food = FULL_COUNTS.unpack_from(message, offset)
+            offset += FULL_COUNTS.size
+            creatures, offset = _take(message, offset, CREATURE, n_creatures)
+            food, offset = _take(message, offset, POSITION, n_food)
+            self.creatures = {int(record['id']): record.copy() for record in creatures}
+            self.food = {int(record['id']): (int(record['x']), int(record['y'])) for record in food}
+            return
+        n_born, n_died, n_moved, n_added, n_removed = DELTA_COUNTS.unpack_from(message, offset)
+        offset += DELTA_COUNTS.size
+        born, offset = _take(message, offset, CREATURE, n_born)
+        died, offset = _take(message, offset, ID, n_died)
+        moved, offset = _take(message, offset, POSITION, n_moved)
+        added, offset = _take(message, offset, POSITION, n_added)
+        removed, offset = _take(message, offset, ID, n_removed)
+        for record in born:
+            self.creatures[int(record['id'])] = record.copy()
+        for id in died:
+            self.creatures.pop(int(id), None)
+        for record in moved:
+            creature = self.creatures[int(record['id'])]
+            creature['x'] = record['x']
+            creature['y'] = record['y']
+        for record in added:
+            self.food[int(record['id'])] = (int(record['x']), int(record['y']))
+        for id in removed:
+            self.food.pop(int(id), None)
+
+
+async def read_message(reader) -> bytes:
+    length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    return await reader.readexactly(length)
+
+
+async def observe(host: str, port: int):
+    """yields a WorldMirror that is updated with every message received"""
+    reader, writer = await asyncio.open_connection(host, port)
+    mirror = WorldMirror()
+    try:
+        while True:
+            mirror.apply(await read_message(reader))
+            yield mirror
+    except asyncio.IncompleteReadError:
+        return
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    # usage: python observer.py host port
+    async def print_updates(host, port):
+        async for mirror in observe(host, port):
+            print(f"tick {mirror.tick}: {len(mirror.creatures)} creatures, {len(mirror.food)} food")
+
+    asyncio.run(print_updates(sys.argv[1], int(sys.argv[2])))
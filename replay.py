@@ -0,0 +1,360 @@
+import pygame
+import struct
+import sys
+import logging
+import numpy as np
+from math import cos, sin
+from objects import Creature
+from dna import BrainDNA, DNA, code_dtype
+
+logger = logging.getLogger(__name__)
+
+# event stream layout (little-endian):
+# header, then a preamble of births / food spawns describing the world at the time
+# the recorder was attached, then for every tick an optional keyframe followed by
+# a tick record and the events that happened during that tick
+
+MAGIC = b'EVOREC01'
+VERSION = 1
+# recordings of quantized genes, the header is followed by the bytes per gene code
+# and the genes of births by a byte of NO_DNA / NO_BRAIN bits and the codes instead of float64
+QUANTIZED_VERSION = 2
+
+HEADER = struct.Struct('<8sHIIHHI')  # magic, version, width, height, gene length, brain gene length, keyframe interval
+CODE_WIDTH = struct.Struct('<B')
+MISSING = struct.Struct('<B')
+KIND = struct.Struct('<B')
+NO_DNA = 1
+NO_BRAIN = 2
+
+TICK = 0
+KEYFRAME = 1
+BIRTH = 2
+DEATH = 3
+DIRECTION = 4
+BOUNCE = 5
+FOOD_SPAWN = 6
+FOOD_EATEN = 7
+
+TICK_BODY = struct.Struct('<d')  # dt
+BIRTH_BODY = struct.Struct('<IIIiiiidd3B')  # id, parent a, parent b, rect, speed, direction, rgb
+ID_BODY = struct.Struct('<I')
+DIRECTION_BODY = struct.Struct('<Id')  # id, direction
+FOOD_BODY = struct.Struct('<Iiiii3Bf')  # id, rect, rgb, value
+KEYFRAME_BODY = struct.Struct('<II')  # number of creatures, number of food
+KEYFRAME_CREATURE = struct.Struct('<Iiiiidddd3B')  # id, rect, speed, direction, x_acc, y_acc, rgb
+
+
+def _rect(obj):
+    return obj.rect.left, obj.rect.top, obj.rect.width, obj.rect.height
+
+
+def _rgb(obj):
+    return obj.color.r, obj.color.g, obj.color.b
+
+
+class Recorder:
+    """
+    Writes births, deaths, food changes and direction changes of a world
+    to a binary event stream that Replayer can play back without running
+    target search or brains
+    """
+    def __init__(self, filename: str, keyframe_interval: int = 600):
+        self.filename = filename
+        self.keyframe_interval = keyframe_interval
+        self.file = None
+        self.ticks = 0
+        self.gene_length = DNA.gene_length
+        self.brain_gene_length = BrainDNA.gene_length
+        # genes are recorded as they are stored, quantized or not, when the recorder is created
+        self.code_dtype = None if DNA.quantization is None else code_dtype(DNA.quantization)
+        if self.code_dtype is None:
+            self._nan_genes = np.full(self.gene_length, np.nan)
+            self._nan_brain_genes = np.full(self.brain_gene_length, np.nan)
+        else:
+            self._nan_genes = np.zeros(self.gene_length, dtype=self.code_dtype)
+            self._nan_brain_genes = np.zeros(self.brain_gene_length, dtype=self.code_dtype)
+        # last recorded direction of each creature, so unchanged brain outputs are skipped
+        self._directions = {}
+
+    def start(self, world):
+        self.file = open(self.filename, mode='wb')
+        if self.code_dtype is None:
+            self.file.write(HEADER.pack(MAGIC, VERSION, world.width, world.height, self.gene_length,
+                                        self.brain_gene_length, self.keyframe_interval))
+        else:
+            self.file.write(HEADER.pack(MAGIC, QUANTIZED_VERSION, world.width, world.height, self.gene_length,
+                                        self.brain_gene_length, self.keyframe_interval) +
+                            CODE_WIDTH.pack(self.code_dtype.itemsize))
+        for creature in world.creatures:
+            self.birth(creature)
+        for food in world.edibles:
+            self.food_spawn(food)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def tick(self, world, dt):
+        if self.ticks % self.keyframe_interval == 0:
+            self.keyframe(world)
+        self.file.write(KIND.pack(TICK) + TICK_BODY.pack(dt))
+        self.ticks += 1
+
+    def keyframe(self, world):
+        chunks = [KIND.pack(KEYFRAME), KEYFRAME_BODY.pack(len(world.creatures), len(world.edibles))]
+        for creature in world.creatures:
+            chunks.append(KEYFRAME_CREATURE.pack(creature.id, *_rect(creature), creature.speed, creature.direction,
+                                                 creature.x_acc, creature.y_acc, *_rgb(creature)))
+        for food in world.edibles:
+            chunks.append(FOOD_BODY.pack(food.id, *_rect(food), *_rgb(food), food.value))
+        self.file.write(b''.join(chunks))
+
+    def birth(self, creature):
+        parents = tuple(creature.parent_ids) + (0, 0)
+        dna = getattr(creature, 'dna', None)
+        brain = getattr(creature, 'brain', None)
+        self.file.write(KIND.pack(BIRTH) + BIRTH_BODY.pack(creature.id, parents[0], parents[1], *_rect(creature),
+                                                           creature.speed, creature.direction, *_rgb(creature)))
+        if self.code_dtype is None:
+            genes = self._nan_genes if dna is None else np.asarray(dna.genes, dtype='<f8')
+            brain_genes = self._nan_brain_genes if brain is None else np.asarray(brain.dna.genes, dtype='<f8')
+            self.file.write(genes.tobytes() + brain_genes.tobytes())
+        else:
+            genes = self._nan_genes if dna is None else dna.quantized(self.code_dtype)
+            brain_genes = self._nan_brain_genes if brain is None else brain.dna.quantized(self.code_dtype)
+            missing = (NO_DNA if dna is None else 0) | (NO_BRAIN if brain is None else 0)
+            self.file.write(MISSING.pack(missing) + genes.tobytes() + brain_genes.tobytes())
+        self._directions[creature.id] = creature.direction
+
+    def death(self, creature):
+        self.file.write(KIND.pack(DEATH) + ID_BODY.pack(creature.id))
+        self._directions.pop(creature.id, None)
+
+    def direction(self, creature):
+        """direction was set before the velocity of this tick was computed"""
+        if self._directions.get(creature.id) == creature.direction:
+            return
+        self._directions[creature.id] = creature.direction
+        self.file.write(KIND.pack(DIRECTION) + DIRECTION_BODY.pack(creature.id, creature.direction))
+
+    def bounce(self, creature):
+        """direction was changed after hitting the world border, the velocity is computed twice"""
+        self._directions[creature.id] = creature.direction
+        self.file.write(KIND.pack(BOUNCE) + DIRECTION_BODY.pack(creature.id, creature.direction))
+
+    def food_spawn(self, food):
+        self.file.write(KIND.pack(FOOD_SPAWN) + FOOD_BODY.pack(food.id, *_rect(food), *_rgb(food), food.value))
+
+    def food_eaten(self, food):
+        self.file.write(KIND.pack(FOOD_EATEN) + ID_BODY.pack(food.id))
+
+
+class Ghost:
+    """replayed creature: just enough state to integrate Creature.get_velocity"""
+    __slots__ = ('id', 'rect', 'speed', 'direction', 'x_acc', 'y_acc', 'color')
+
+    def __init__(self, id, rect, speed, direction, color, x_acc=0.0, y_acc=0.0):
+        self.id = id
+        self.rect = rect
+        self.speed = speed
+        self.direction = direction
+        self.color = color
+        self.x_acc = x_acc
+        self.y_acc = y_acc
+
+    get_velocity = Creature.get_velocity
+
+
+class Replayer:
+    """reconstructs a recorded run tick by tick"""
+    def __init__(self, filename: str):
+        with open(filename, mode='rb') as file_handle:
+            self.data = file_handle.read()
+        magic, version, self.width, self.height, self.gene_length, self.brain_gene_length, \
+            self.keyframe_interval = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version not in (VERSION, QUANTIZED_VERSION):
+            raise ValueError(f"{filename} is not a recording")
+        self.bounds = pygame.Rect(0, 0, self.width, self.height)
+        self.events_start = HEADER.size
+        if version == QUANTIZED_VERSION:
+            code_width, = CODE_WIDTH.unpack_from(self.data, HEADER.size)
+            self.events_start += CODE_WIDTH.size
+            self.genes_size = 1 + code_width * (self.gene_length + self.brain_gene_length)
+        else:
+            self.genes_size = 8 * (self.gene_length + self.brain_gene_length)
+
+        self.creatures = []
+        self.edibles = {}
+        self.tick = 0
+        self.tick_offsets = []
+        self.keyframe_offsets = {}
+        self._index()
+
+        # apply the preamble
+        self._apply_events(self.events_start, {}, {}, set())
+
+    @property
+    def total_ticks(self):
+        return len(self.tick_offsets)
+
+    def _index(self):
+        offset = self.events_start
+        data = self.data
+        while offset < len(data):
+            kind = data[offset]
+            if kind == KEYFRAME:
+                self.keyframe_offsets[len(self.tick_offsets)] = offset
+            elif kind == TICK:
+                self.tick_offsets.append(offset)
+            offset = self._skip(offset)
+
+    def _skip(self, offset):
+        kind = self.data[offset]
+        offset += KIND.size
+        if kind == TICK:
+            return offset + TICK_BODY.size
+        if kind == BIRTH:
+            return offset + BIRTH_BODY.size + self.genes_size
+        if kind in (DEATH, FOOD_EATEN):
+            return offset + ID_BODY.size
+        if kind in (DIRECTION, BOUNCE):
+            return offset + DIRECTION_BODY.size
+        if kind == FOOD_SPAWN:
+            return offset + FOOD_BODY.size
+        if kind == KEYFRAME:
+            n_creatures, n_food = KEYFRAME_BODY.unpack_from(self.data, offset)
+            return offset + KEYFRAME_BODY.size + n_creatures * KEYFRAME_CREATURE.size + n_food * FOOD_BODY.size
+        raise ValueError(f"corrupt recording: unknown event {kind} at {offset - KIND.size}")
+
+    def _apply_events(self, offset, directions, bounces, deaths):
+        """applies events up to the next tick, returns the offset where it stopped"""
+        data = self.data
+        while offset < len(data):
+            kind = data[offset]
+            body = offset + KIND.size
+            if kind == TICK or kind == KEYFRAME:
+                break
+            if kind == BIRTH:
+                id, _, _, left, top, width, height, speed, direction, r, g, b = BIRTH_BODY.unpack_from(data, body)
+                self.creatures.append(Ghost(id, pygame.Rect(left, top, width, height), speed, direction,
+                                            pygame.Color(r, g, b)))
+            elif kind == DEATH:
+                deaths.add(ID_BODY.unpack_from(data, body)[0])
+            elif kind == DIRECTION:
+                id, direction = DIRECTION_BODY.unpack_from(data, body)
+                directions[id] = direction
+            elif kind == BOUNCE:
+                id, direction = DIRECTION_BODY.unpack_from(data, body)
+                bounces[id] = direction
+            elif kind == FOOD_SPAWN:
+                id, left, top, width, height, r, g, b, _ = FOOD_BODY.unpack_from(data, body)
+                self.edibles[id] = (pygame.Rect(left, top, width, height), pygame.Color(r, g, b))
+            elif kind == FOOD_EATEN:
+                self.edibles.pop(ID_BODY.unpack_from(data, body)[0], None)
+            offset = self._skip(offset)
+        return offset
+
+    def _load_keyframe(self, offset):
+        n_creatures, n_food = KEYFRAME_BODY.unpack_from(self.data, offset + KIND.size)
+        offset += KIND.size + KEYFRAME_BODY.size
+        self.creatures = []
+        for _ in range(n_creatures):
+            id, left, top, width, height, speed, direction, x_acc, y_acc, r, g, b = \
+                KEYFRAME_CREATURE.unpack_from(self.data, offset)
+            self.creatures.append(Ghost(id, pygame.Rect(left, top, width, height), speed, direction,
+                                        pygame.Color(r, g, b), x_acc, y_acc))
+            offset += KEYFRAME_CREATURE.size
+        self.edibles = {}
+        for _ in range(n_food):
+            id, left, top, width, height, r, g, b, _ = FOOD_BODY.unpack_from(self.data, offset)
+            self.edibles[id] = (pygame.Rect(left, top, width, height), pygame.Color(r, g, b))
+            offset += FOOD_BODY.size
+
+    def step(self) -> bool:
+        """advances one tick, returns False at the end of the recording"""
+        if self.tick >= self.total_ticks:
+            return False
+        offset = self.tick_offsets[self.tick]
+        dt = TICK_BODY.unpack_from(self.data, offset + KIND.size)[0]
+        directions = {}
+        bounces = {}
+        deaths = set()
+        self._apply_events(offset + KIND.size + TICK_BODY.size, directions, bounces, deaths)
+
+        # same iteration as World.update_creatures: a creature removed from the list
+        # during the loop makes the iteration skip the following one
+        creatures = self.creatures
+        i = 0
+        while i < len(creatures):
+            ghost = creatures[i]
+            if ghost.id in directions:
+                ghost.direction = directions[ghost.id]
+            vel_x, vel_y = ghost.get_velocity(dt)
+            new_rect = ghost.rect.move(vel_x, vel_y)
+            if ghost.id in bounces:
+                ghost.direction = bounces[ghost.id]
+                vel_x, vel_y = ghost.get_velocity(dt)
+                new_rect = ghost.rect.move(vel_x, vel_y)
+            ghost.rect = new_rect.clamp(self.bounds)
+            if ghost.id in deaths:
+                del creatures[i]
+            i += 1
+
+        self.tick += 1
+        return True
+
+    def seek(self, tick: int):
+        tick = max(0, min(tick, self.total_ticks))
+        keyframes = [k for k in self.keyframe_offsets if k <= tick]
+        if tick < self.tick or (keyframes and max(keyframes) > self.tick):
+            keyframe = max(keyframes)
+            self._load_keyframe(self.keyframe_offsets[keyframe])
+            self.tick = keyframe
+        while self.tick < tick:
+            self.step()
+
+    def draw(self, surface: pygame.Surface):
+        white = pygame.Color(255, 255, 255)
+        for ghost in self.creatures:
+            pygame.draw.rect(surface, ghost.color, ghost.rect)
+            a = pygame.math.Vector2(ghost.rect.center)
+            b = pygame.math.Vector2(a.x - ghost.rect.width * cos(ghost.direction),
+                                    a.y - ghost.rect.width * sin(ghost.direction))
+            pygame.draw.line(surface, white, a, b)
+        for rect, color in self.edibles.values():
+            pygame.draw.rect(surface, color, rect)
+
+
+if __name__ == '__main__':
+    # usage: python replay.py <recording> [ticks per frame]
+    # space pauses, left/right arrows seek one keyframe interval
+    replayer = Replayer(sys.argv[1])
+    speed = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    pygame.init()
+    screen = pygame.display.set_mode((replayer.width, replayer.height))
+    clock = pygame.time.Clock()
+    font = pygame.font.Font('freesansbold.ttf', 14)
+    paused = False
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    replayer.seek(replayer.tick + replayer.keyframe_interval)
+                elif event.key == pygame.K_LEFT:
+                    replayer.seek(replayer.tick - replayer.keyframe_interval)
+        if not paused:
+            for _ in range(speed):
+                if not replayer.step():
+                    break
+        screen.fill((0, 0, 0))
+        replayer.draw(screen)
+        text = font.render(f"tick {replayer.tick}/{replayer.total_ticks}", True, (255, 255, 255), (0, 0, 0))
+        screen.blit(text, (10, 10))
+        pygame.display.flip()
+        clock.tick(60)
@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from brain import Brain
+from dna import DNA
+from objects import Creature
+
+logger = logging.getLogger(__name__)
+
+# parameters a sweep can vary and their defaults (the setup of main.py); class attributes
+# are patched in the worker process, the rest are passed to World
+defaults = {
+    'mutation_rate': DNA.mutation_rate,
+    'base_health': Creature.base_health,
+    'multiply_delay': Creature.multiply_delay,
+    'food_spawn_interval': 1000,
+    'max_creatures': 100,
+    'random_spawning': False,
+    'creature_spawn_interval': 1000,
+    'pop_size': 50,
+    'food': 100,
+    'width': 1024,
+    'height': 768,
+}
+
+# files whose content decides the simulation outcome
+source_files = ('auxiliary.py', 'brain.py', 'dna.py', 'objects.py', 'camera.py', 'sweep.py')
+cache_dir = '.sweep_cache'
+
+
+def code_version() -> str:
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for filename in source_files:
+        with open(os.path.join(directory, filename), mode='rb') as file_handle:
+            digest.update(file_handle.read())
+    return digest.hexdigest()[:16]
+
+
+def modes() -> dict:
+    """global settings of this process that change the results: gene quantization and brain lookup tables"""
+    return {
+        'quantization': None if DNA.quantization is None else np.dtype(DNA.quantization).name,
+        'lookup_resolution': Brain.lookup_resolution,
+        'lookup_interpolation': Brain.lookup_interpolation,
+    }
+
+
+def cache_key(params: dict, seed: int, ticks: int, dt: float, version: str, settings: dict = None) -> str:
+    description = json.dumps({'params': params, 'seed': seed, 'ticks': ticks, 'dt': dt, 'version': version,
+                              'modes': modes() if settings is None else settings}, sort_keys=True)
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def run_configuration(params: dict, seed: int, ticks: int, dt: float, settings: dict = None) -> dict:
+    """runs one headless world and returns its summary metrics"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from brain import Brain
+    from dna import BrainDNA, DNA
+    import objects as obj
+
+    # workers don't necessarily inherit the settings of the process that started the sweep
+    if settings is not None:
+        DNA.quantization = None if settings['quantization'] is None else np.dtype(settings['quantization']).type
+        Brain.lookup_resolution = settings['lookup_resolution']
+        Brain.lookup_interpolation = settings['lookup_interpolation']
+    params = {**defaults, **params}
+    DNA.mutation_rate = params['mutation_rate']
+    obj.Creature.base_health = params['base_health']
+    obj.Creature.multiply_delay = params['multiply_delay']
+    random.seed(seed)
+    np.random.seed(seed)
+
+    width, height = params['width'], params['height']
+    pop_size = params['pop_size']
+    positions = np.column_stack((np.random.randint(0, width + 1, pop_size), np.random.randint(0, height + 1, pop_size)))
+    creatures = obj.BrainCreature.many(positions, obj.dna_list(None, DNA, pop_size),
+                                       obj.dna_list(None, BrainDNA, pop_size))
+    food = [obj.Food(random.uniform(0, width), random.uniform(0, height)) for _ in range(params['food'])]
+    world = obj.World(width, height, creatures=creatures, edibles=food, headless=True,
+                      food_spawn_interval=params['food_spawn_interval'], max_creatures=params['max_creatures'],
+                      random_spawning=params['random_spawning'],
+                      creature_spawn_interval=params['creature_spawn_interval'])
+
+    population = []
+    extinct_tick = None
+    for tick in range(ticks):
+        world.step(dt)
+        population.append(len(world.creatures))
+        if not world.creatures:
+            extinct_tick = tick
+            break
+
+    alive = world.creatures
+    births = world.creature_total - params['pop_size']
+    return {
+        'population': len(alive),
+        'mean_population': float(np.mean(population)) if population else 0.0,
+        'max_population': max(population, default=0),
+        'births': births,
+        'deaths': params['pop_size'] + births - len(alive),
+        'extinct_tick': extinct_tick,
+        'food': len(world.edibles),
+        'avg_food_consumed': float(np.mean([creature.food_consumed for creature in alive])) if alive else 0.0,
+        'mean_genes': np.mean([creature.dna.genes for creature in alive], axis=0).tolist() if alive else None,
+    }
+
+
+class Sweep:
+    """
+    Runs every combination of a parameter grid for several seeds in a process pool,
+    caching every finished cell on disk under a key built from the parameters,
+    the seed, the run length and the source code
+    """
+    def __init__(self, grid: dict, seeds=(0,), ticks: int = 1000, dt: float = 1000 / 60, workers: int = None,
+                 cache: str = cache_dir):
+        unknown = set(grid) - set(defaults)
+        if unknown:
+            raise ValueError(f"unknown sweep parameters: {', '.join(sorted(unknown))}")
+        self.grid = grid
+        self.seeds = list(seeds)
+        self.ticks = ticks
+        self.dt = dt
+        self.workers = workers
+        self.cache = cache
+        self.version = code_version()
+        self.modes = modes()
+
+    def cells(self) -> list:
+        names = sorted(self.grid)
+        return [(dict(zip(names, values)), seed)
+                for values in itertools.product(*(self.grid[name] for name in names)) for seed in self.seeds]
+
+    def _path(self, params: dict, seed: int) -> str:
+        key = cache_key(params, seed, self.ticks, self.dt, self.version, self.modes)
+        return os.path.join(self.cache, key + '.json')
+
+    def run(self) -> list:
+        """:return: one (params, seed, metrics) entry per cell"""
+        os.makedirs(self.cache, exist_ok=True)
+        cells = self.cells()
+        results = {}
+        missing = []
+        for i, (params, seed) in enumerate(cells):
+            path = self._path(params, seed)
+            if os.path.exists(path):
+                with open(path) as file_handle:
+                    results[i] = json.load(file_handle)['metrics']
+            else:
+                missing.append(i)
+        logger.info(f"{len(cells) - len(missing)} of {len(cells)} cells cached, running {len(missing)}")
+
+        if missing:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {i: pool.submit(run_configuration, cells[i][0], cells[i][1], self.ticks, self.dt,
+                                          self.modes)
+                           for i in missing}
+                for i, future in futures.items():
+                    params, seed = cells[i]
+                    results[i] = future.result()
+                    # write then rename so an interrupted sweep never leaves a broken cell
+                    path = self._path(params, seed)
+                    with open(path + '.tmp', mode='w') as file_handle:
+                        json.dump({'params': params, 'seed': seed, 'ticks': self.ticks, 'dt': self.dt,
+                                   'version': self.version, 'modes': self.modes, 'metrics': results[i]}, file_handle)
+                    os.replace(path + '.tmp', path)
+        return [(params, seed, results[i]) for i, (params, seed) in enumerate(cells)]
+
+
+def parse_grid(assignments: list) -> dict:
+    """['mutation_rate=0.01,0.05', 'max_creatures=50'] -> {'mutation_rate': [0.01, 0.05], 'max_creatures': [50]}"""
+    grid = {}
+    for assignment in assignments:
+        name, values = assignment.split('=', 1)
+        grid[name] = [json.loads(value) for value in values.split(',')]
+    return grid
+
+
+if __name__ == '__main__':
+    # usage: python sweep.py mutation_rate=0.01,0.05,0.1 max_creatures=50,100 --seeds 3 --ticks 2000
+    logging.basicConfig(format='%(asctime)s %(message)s', level=logging.INFO, handlers=[logging.StreamHandler(sys.stdout)])
+    parser = argparse.ArgumentParser(description="headless parameter sweep")
+    parser.add_argument('grid', nargs='+', help="name=value1,value2,... for any of: " + ', '.join(defaults))
+    parser.add_argument('--seeds', type=int, default=1, help="number of seeds per configuration")
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--dt', type=float, default=1000 / 60, help="simulated milliseconds per tick")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache', default=cache_dir)
+    args = parser.parse_args()
+
+    sweep = Sweep(parse_grid(args.grid), seeds=range(args.seeds), ticks=args.ticks, dt=args.dt,
+                  workers=args.workers, cache=args.cache)
+    for params, seed, metrics in sweep.run():
+        print(params, f"seed={seed}", f"population={metrics['population']}",
+              f"mean_population={metrics['mean_population']:.1f}", f"births={metrics['births']}",
+              f"deaths={metrics['deaths']}", f"extinct_tick={metrics['extinct_tick']}")